@@ -18,11 +18,26 @@ this argument to understand the protocol.
 * "board_size=n" or "b=n" creates a custom square board of size
 nxn. Use this argument in conjunction with "-p" for more human-
 readable protocol messages.
-* "-log" or "-l" saves the match to a csv file under src/logs.
-It will record all moves and the end state of the game. Check
-the documentation pdf for more details.
+* "-log" or "-l" saves the match to a csv file under logs, named
+after the start time and process id. It will record all moves and
+the end state of the game. Check the documentation pdf for more
+details.
+* "-binary_log" or "-bl" also saves every move as a fixed-size
+binary record next to the csv file. Check src/LogWriter.py for the
+record format.
 * "-switch" or "-s" will invert the order of agents playing. Use
 this argument to quickly test your agent as Blue instead of Red.
+* "port=n" runs the engine on port n instead of 1234. With port=0
+a free port is chosen. Agents get the port in the HEX_PORT
+environment variable. Use src/tournament.py to run many matches at
+once.
+* "-delta" or "-dp" offers both agents the delta protocol, where
+CHANGE messages carry a board checksum every few turns instead of the
+whole board. Agents that don't reply DELTA to START keep the normal
+protocol. The reply is read with the agent's first message and nobody
+waits for it, so Red's reply is billed to its first move, and any agent
+gets full boards until its reply has arrived. Check
+agents/Group003/agent003.py for an agent that uses it.
 """
 import shlex
 import subprocess
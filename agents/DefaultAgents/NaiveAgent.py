@@ -1,4 +1,5 @@
 import socket
+from os import environ
 from random import choice
 from time import sleep
 
@@ -9,7 +10,8 @@ class NaiveAgent():
     """
 
     HOST = "127.0.0.1"
-    PORT = 1234
+    # the engine passes its port in HEX_PORT when it isn't the default
+    PORT = int(environ.get("HEX_PORT", 1234))
 
     def run(self):
         """A finite-state machine that cycles through waiting for input
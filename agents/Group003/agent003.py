@@ -1,7 +1,16 @@
 import socket
+import os
+import selectors
 import math
+import sys
+import time
 from mcts.uct_algorithm import UCT
+from mcts.root_parallel import RootParallelUCT
+from mcts.shared_tree import TreeParallelUCT
+from mcts.array_tree import ArrayUCT
 from mcts.Colour import Colour
+from mcts.time_manager import TimeManager
+from mcts.protocol_board import ProtocolBoard
 
 class Agent003():
     """
@@ -9,38 +18,103 @@ class Agent003():
     """
 
     HOST = "127.0.0.1"
-    PORT = 1234
-
-    def __init__(self, board_size=11):
-        self.s = socket.socket(
-            socket.AF_INET, socket.SOCK_STREAM
-        )
-
-        self.s.connect((self.HOST, self.PORT))
+    # engine port, set by tournaments running several games at once
+    PORT = int(os.environ.get("HEX_PORT", 1234))
+    # search iterations run between two checks of the socket while pondering
+    PONDER_BATCH = 32
 
+    def __init__(self, board_size=11, workers=1, parallel="root", tree="nodes", ponder=True, max_nodes=0, profile_log=None, delta=True):
         self.board_size = board_size
         self.board = []
         self.colour = ""
         self.turn_count = 0
         self.n_openings = 0
         self.board_string = ""
-        self.uct = UCT(
-            board_size = self.board_size,
-            colour= Colour.from_char(self.colour), 
-            c = 1/math.sqrt(2)
+        # keep searching on the opponent's time
+        self.pondering = ponder
+        # file receiving one JSON line of search counters per move
+        self.profile_log = profile_log
+        # accept the engine's delta protocol when offered, and keep the
+        # board string up to date from the moves alone
+        self.accept_delta = delta
+        self.delta = False
+        self.protocol_board = ProtocolBoard(board_size)
+
+        # Splits the 5 minute match clock between our moves
+        self.clock = TimeManager()
+        self.received_at = time.time()
+
+        # With more than one worker, the search runs root-parallel or on one
+        # shared tree. The pool is started here, before connecting, so that
+        # no process is spawned during the game and workers don't inherit
+        # the socket.
+        if workers > 1 and parallel == "tree":
+            self.uct = TreeParallelUCT(
+                workers,
+                board_size = self.board_size,
+                colour= Colour.from_char(self.colour), 
+                c = 1/math.sqrt(2)
+            )
+        elif workers > 1:
+            self.uct = RootParallelUCT(
+                workers,
+                board_size = self.board_size,
+                colour= Colour.from_char(self.colour), 
+                c = 1/math.sqrt(2),
+                max_nodes = max_nodes
+            )
+        elif tree == "array":
+            self.uct = ArrayUCT(
+                board_size = self.board_size,
+                colour= Colour.from_char(self.colour), 
+                c = 1/math.sqrt(2)
+            )
+        else:
+            # max_nodes caps the tree, 0 leaves it unbounded
+            self.uct = UCT(
+                board_size = self.board_size,
+                colour= Colour.from_char(self.colour), 
+                c = 1/math.sqrt(2),
+                max_nodes = max_nodes
+            )
+
+        self.s = socket.socket(
+            socket.AF_INET, socket.SOCK_STREAM
         )
 
+        self.s.connect((self.HOST, self.PORT))
+
     def run(self):
         """Reads data until it receives an END message or the socket closes."""
 
+        # The socket is polled between small batches of pondering, so the
+        # search keeps growing the tree until the opponent's move arrives.
+        selector = selectors.DefaultSelector()
+        selector.register(self.s, selectors.EVENT_READ)
+        idle = not self.pondering
+
         while True:
+            if not selector.select(None if idle else 0):
+                idle = not self.uct.ponder(self.PONDER_BATCH)
+                continue
+            idle = not self.pondering
+
             data = self.s.recv(1024)
+            # the engine's clock for our move starts about now
+            self.received_at = time.time()
             if not data:
                 break
             # print(f"{self.colour} {data.decode('utf-8')}", end="")
             if (self.interpret_data(data)):
                 break
 
+        selector.close()
+
+        if isinstance(self.uct, (RootParallelUCT, TreeParallelUCT)):
+            self.uct.close()
+        if self.profile_log not in (None, sys.stderr):
+            self.profile_log.close()
+
         # print(f"Naive agent {self.colour} terminated")
 
     def interpret_data(self, data):
@@ -59,6 +133,13 @@ class Agent003():
                 self.uct.colour = Colour.from_char(s[2])
                 self.board = [
                     [0]*self.board_size for i in range(self.board_size)]
+                self.protocol_board = ProtocolBoard(self.board_size)
+
+                # the answer to the offer has to come before any move, and
+                # is sent before searching as Red's clock is running
+                if len(s) > 3 and s[3] == "DELTA" and self.accept_delta:
+                    self.delta = True
+                    self.s.sendall(b"DELTA\n")
 
                 if self.colour == "R":
                     self.make_move()
@@ -71,21 +152,50 @@ class Agent003():
                     return True
 
                 elif s[1] == "SWAP":
+                    # The stones stay where they are, only the players trade
+                    # colours, so the kept tree still holds this position.
                     self.colour = self.opp_colour()
                     self.uct.colour = self.uct.colour.opposite()
-                    self.board_string = s[2]
+                    self.update_board(s)
                     if s[3] == self.colour:
                         self.make_move()
 
-                elif s[3] == self.colour:
-                    self.board_string = s[2]
+                else:
+                    # keep the search tree in step with the game, for our
+                    # own moves as well as the opponent's
                     action = [int(x) for x in s[1].split(",")]
-                    self.board[action[0]][action[1]] = self.opp_colour()
+                    self.uct.advance(action[0], action[1])
+                    self.update_board(s, action)
 
-                    self.make_move()
+                    if s[3] == self.colour:
+                        self.board[action[0]][action[1]] = self.opp_colour()
+
+                        self.make_move()
 
         return False
 
+    def update_board(self, s, action=None):
+        """Brings the board string up to date with a CHANGE message. In the
+        delta protocol the move is played on the kept board, which is
+        checked against the engine's checksum when one is sent. Otherwise
+        the message holds the whole board, as it does in the delta protocol
+        until the engine has read our answer.
+        """
+        if not self.delta or not s[2].startswith("#"):
+            self.protocol_board.set(s[2])
+        else:
+            if action is not None:
+                # the player to move next is not the one who just moved
+                mover = "B" if s[3] == "R" else "R"
+                self.protocol_board.play(action[0], action[1], mover)
+            if not self.protocol_board.matches(s[2]):
+                print(
+                    f"Board checksum {self.protocol_board.checksum()} does "
+                    f"not match the engine's {s[2][1:]}",
+                    file=sys.stderr
+                )
+        self.board_string = self.protocol_board.string()
+
     def make_move(self):
         """
         (-1,-1) for swap, else play the move on the tile.
@@ -98,8 +208,18 @@ class Agent003():
             # Including SWAP
             pass
         else:
+            if self.board_string:
+                empty_cells = self.board_string.count("0")
+            else:
+                empty_cells = self.board_size * self.board_size
+            self.uct.TIME = self.clock.budget(empty_cells)
+
             action = self.uct.search(self.board_string)
             self.s.sendall(action)
+            self.clock.record(time.time() - self.received_at)
+
+            if self.profile_log is not None and isinstance(self.uct, UCT):
+                self.uct.write_profile(self.profile_log, turn=self.turn_count)
 
         self.turn_count += 1
 
@@ -116,5 +236,36 @@ class Agent003():
             return "None"
 
 if (__name__ == "__main__"):
-    agent = Agent003()
+    # optional "workers=N" argument enables parallel search,
+    # "parallel=tree" shares one tree instead of merging root statistics,
+    # "tree=array" searches single-process on the struct-of-arrays tree,
+    # "-no_ponder" stops searching during the opponent's turn,
+    # "max_nodes=N" caps the node tree at N nodes,
+    # "profile=PATH" appends per-move search counters to PATH, "profile=-"
+    # writes them to stderr,
+    # "-no_delta" declines the engine's delta protocol
+    workers = 1
+    parallel = "root"
+    tree = "nodes"
+    max_nodes = 0
+    profile_log = None
+    ponder = "-no_ponder" not in sys.argv
+    delta = "-no_delta" not in sys.argv
+    for argument in sys.argv[1:]:
+        if argument.startswith("workers="):
+            workers = int(argument.split("=")[1])
+        elif argument.startswith("parallel="):
+            parallel = argument.split("=")[1]
+        elif argument.startswith("tree="):
+            tree = argument.split("=")[1]
+        elif argument.startswith("max_nodes="):
+            max_nodes = int(argument.split("=")[1])
+        elif argument.startswith("profile="):
+            path = argument.split("=", 1)[1]
+            profile_log = sys.stderr if path == "-" else open(path, "a")
+
+    agent = Agent003(
+        workers=workers, parallel=parallel, tree=tree, ponder=ponder,
+        max_nodes=max_nodes, profile_log=profile_log, delta=delta
+    )
     agent.run()
\ No newline at end of file
@@ -0,0 +1,242 @@
+"""Brute-force soundness check of the inferior cell analysis and the
+virtual connections on small boards.
+
+Positions are sampled by random play and solved exactly by negamax, then
+checked against mcts/inferior.py and mcts/vc.py:
+* filling every dead cell with either colour, and every captured cell
+with its capturer's colour, must not change the winner;
+* if the player to move wins, the moves left after pruning the dead and
+captured cells must still hold a winning move;
+* the winner given by the virtual connections, if any, must be the real
+one.
+
+A pruned search must also still play an immediate win hidden in a
+captured pair, on a fixed 5x5 position.
+
+Run from this directory after changing inferior.py or vc.py. Exits with
+status 1 if any check fails. tests/test_soundness.py runs the same checks
+on every 3x3 position.
+
+Possible arguments:
+* "board_size=n" or "b=n" sets the board size, 4 by default. Boards
+larger than 4 take too long to solve.
+* "positions=n" or "p=n" sets the number of positions sampled, 2000 by
+default. Finished games are skipped. On 3x3 every position is checked
+instead.
+* "seed=n" or "s=n" seeds the sampling, 0 by default.
+"""
+from itertools import product
+from random import Random
+from sys import argv, exit
+
+from mcts.ArrayBoard import ArrayBoard, COLOURS
+from mcts.Colour import Colour
+from mcts.inferior import analyse
+from mcts.uct_algorithm import UCT
+from mcts.vc import VCEngine
+
+# Red to move wins at once on either cell of its captured pair at 4,0 and
+# 4,1. Pruning used to drop the pair and with it the win.
+CAPTURED_WIN = "0R000,0R000,0R0B0,BRB00,000B0"
+CAPTURED_WIN_MOVES = {(4, 0), (4, 1)}
+
+
+def play(board, idx, colour):
+    size = board.get_size()
+    board.set_tile_colour(idx // size, idx % size, colour)
+
+
+def wins(board, to_move, memo):
+    """Checks if to_move wins the position on board with correct play."""
+
+    if (board.has_ended()):
+        return board.get_winner() == to_move
+
+    key = (bytes(board.get_cells()), to_move)
+    result = memo.get(key)
+    if (result is None):
+        result = False
+        for idx in board.get_empty_cells():
+            play(board, idx, to_move)
+            result = not wins(board, to_move.opposite(), memo)
+            board.undo()
+            if (result):
+                break
+        memo[key] = result
+    return result
+
+
+def winning_moves(board, to_move, memo):
+    """Returns the empty cells that win for to_move."""
+
+    moves = set()
+    for idx in board.get_empty_cells():
+        play(board, idx, to_move)
+        if (not wins(board, to_move.opposite(), memo)):
+            moves.add(idx)
+        board.undo()
+    return moves
+
+
+def check_inferior(board, to_move, memo):
+    """Checks the dead and captured cells of one position. Returns the
+    list of failures found, as text.
+    """
+
+    failures = []
+    won = wins(board, to_move, memo)
+    dead, captured = analyse(board)
+
+    for filler in (Colour.RED, Colour.BLUE):
+        for idx in dead:
+            play(board, idx, filler)
+        for idx, code in captured.items():
+            play(board, idx, COLOURS[code])
+        if (wins(board, to_move, memo) != won):
+            failures.append(
+                f"filling dead cells {sorted(dead)} with " +
+                f"{Colour.get_char(filler)} and captured cells " +
+                f"{sorted(captured)} changes the winner"
+            )
+        board.undo_all()
+
+    if (won):
+        useful = set(board.get_empty_cells()) - dead - set(captured)
+        if (useful and not useful & winning_moves(board, to_move, memo)):
+            failures.append(
+                f"pruning {sorted(dead | set(captured))} removes every " +
+                "winning move"
+            )
+
+    return failures
+
+
+def check_vc(board, to_move, memo, engine):
+    """Checks the virtual connection verdict on one position. Returns the
+    list of failures found, as text.
+    """
+
+    verdict = engine.winner(board, to_move)
+    if (verdict is None):
+        return []
+
+    winner = to_move if wins(board, to_move, memo) else to_move.opposite()
+    if (verdict == winner):
+        return []
+    return [
+        f"virtual connections give {Colour.get_char(verdict)} the win, " +
+        f"but {Colour.get_char(winner)} wins"
+    ]
+
+
+def check_captured_win():
+    """Checks that a pruned search plays the immediate win of CAPTURED_WIN.
+    Returns the list of failures found, as text.
+    """
+
+    uct = UCT(board_size=5, colour=Colour.RED, prune=True)
+    result = uct.run(CAPTURED_WIN, iterations=200, seed=0)
+    if (result.move in CAPTURED_WIN_MOVES):
+        return []
+    return [
+        f"pruned search plays {result.move} instead of the immediate win " +
+        f"in {sorted(CAPTURED_WIN_MOVES)}"
+    ]
+
+
+def positions(board_size, count, seed):
+    """Yields the positions to check as tuples of R, B and 0, one per
+    cell. Red moves first, so the counts of stones are equal or red has
+    one more.
+    """
+
+    cells = board_size * board_size
+    if (board_size <= 3):
+        for codes in product("0RB", repeat=cells):
+            reds, blues = codes.count("R"), codes.count("B")
+            if (reds == blues or reds == blues + 1):
+                yield codes
+        return
+
+    rng = Random(seed)
+    seen = set()
+    while (len(seen) < count):
+        order = rng.sample(range(cells), rng.randint(2, cells - 2))
+        codes = ["0"] * cells
+        for turn, idx in enumerate(order):
+            codes[idx] = "RB"[turn % 2]
+        codes = tuple(codes)
+        if (codes not in seen):
+            seen.add(codes)
+            yield codes
+
+
+def boards(board_size, count, seed):
+    """Yields (board, player to move) for the unfinished positions among
+    those of positions().
+    """
+
+    for codes in positions(board_size, count, seed):
+        rows = ["".join(codes[x * board_size:(x + 1) * board_size])
+                for x in range(board_size)]
+        board = ArrayBoard.from_string(",".join(rows), board_size)
+        if (board.has_ended()):
+            continue
+        to_move = Colour.RED
+        if (codes.count("R") > codes.count("B")):
+            to_move = Colour.BLUE
+        yield (board, to_move)
+
+
+def main():
+    board_size = 4
+    count = 2000
+    seed = 0
+
+    for argument in argv[1:]:
+        try:
+            if (argument.startswith("board_size=") or
+                    argument.startswith("b=")):
+                board_size = int(argument.split("=")[1])
+                if (board_size < 1):
+                    raise Exception("Board size too small.")
+            elif (argument.startswith("positions=") or
+                    argument.startswith("p=")):
+                count = int(argument.split("=")[1])
+            elif (argument.startswith("seed=") or
+                    argument.startswith("s=")):
+                seed = int(argument.split("=")[1])
+        except Exception:
+            print(f"ERROR: Argument '{argument}' is not valid. Aborted.")
+            exit(2)
+
+    memo = {}
+    engine = VCEngine()
+    checked = 0
+    failed = 0
+
+    failures = check_captured_win()
+    if (failures):
+        failed += 1
+        print(f"{CAPTURED_WIN} R to move:")
+        for failure in failures:
+            print(f"  {failure}")
+    for board, to_move in boards(board_size, count, seed):
+        checked += 1
+        failures = check_inferior(board, to_move, memo)
+        failures += check_vc(board, to_move, memo, engine)
+        if (failures):
+            failed += 1
+            print(f"{board.print_board()} {Colour.get_char(to_move)} " +
+                  "to move:")
+            for failure in failures:
+                print(f"  {failure}")
+
+    print(f"{checked} positions checked on {board_size}x{board_size}, " +
+          f"{failed} failed.")
+    if (failed):
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+import random
+from typing import List, Tuple
+from mcts.Tile import Tile
+from mcts.Colour import Colour
+from mcts.UnionFind import UnionFind
+
+# cell codes stored in the flat buffer
+EMPTY = 0
+RED = 1
+BLUE = 2
+
+COLOURS = (None, Colour.RED, Colour.BLUE)
+CODES = {None: EMPTY, Colour.RED: RED, Colour.BLUE: BLUE}
+CHARS = "0RB"
+
+_neighbour_tables = {}
+_zobrist_tables = {}
+
+
+def neighbour_table(board_size: int) -> Tuple[Tuple[int, ...], ...]:
+    """Returns, for every flat cell index, the indices of its on-board
+    neighbours. Tables are built once per board size and shared.
+    """
+
+    table = _neighbour_tables.get(board_size)
+    if table is None:
+        rows = []
+        for x in range(board_size):
+            for y in range(board_size):
+                neighbours = []
+                for idx in range(Tile.NEIGHBOUR_COUNT):
+                    x_n = x + Tile.I_DISPLACEMENTS[idx]
+                    y_n = y + Tile.J_DISPLACEMENTS[idx]
+                    if (0 <= x_n < board_size and 0 <= y_n < board_size):
+                        neighbours.append(x_n * board_size + y_n)
+                rows.append(tuple(neighbours))
+        table = tuple(rows)
+        _neighbour_tables[board_size] = table
+    return table
+
+
+def zobrist_table(board_size: int) -> Tuple[Tuple[int, ...], ...]:
+    """Returns the Zobrist keys for a board size, indexed by cell code and
+    then by flat cell index. The keys come from a fixed seed, so every
+    process agrees on the hash of a position.
+    """
+
+    table = _zobrist_tables.get(board_size)
+    if table is None:
+        rng = random.Random(board_size)
+        area = board_size * board_size
+        table = (
+            (0,) * area,
+            tuple(rng.getrandbits(64) for _ in range(area)),
+            tuple(rng.getrandbits(64) for _ in range(area)),
+        )
+        _zobrist_tables[board_size] = table
+    return table
+
+
+class ArrayBoard:
+    """Hex board backed by a flat bytearray of cell codes.
+
+    Exposes the same public API as Board, but copying is a buffer copy
+    instead of a deepcopy over one Tile object per cell. Connectivity is
+    tracked incrementally with a union-find, as in Board.
+    """
+
+    def __init__(self, board_size=11):
+        super().__init__()
+
+        self._board_size = board_size
+        self._cells = bytearray(board_size * board_size)
+        self._neighbours = neighbour_table(board_size)
+        self._winner = None
+
+        # Zobrist hash of the stones, updated on every placement and undo
+        self._zobrist = zobrist_table(board_size)
+        self._hash = 0
+
+        # one node per cell plus four virtual edge nodes
+        area = board_size * board_size
+        self._top, self._bottom = area, area + 1
+        self._left, self._right = area + 2, area + 3
+        self._uf = UnionFind(area + 4)
+
+        # (cell, previous winner, union-find mark) for every placed stone
+        self._history = []
+
+    def from_string(string_input, board_size=11, bnf=True):
+        """Loads a board from a string representation. If bnf=True, it will
+        load a protocol-formatted string. Otherwise, it will load from a
+        human-readable-formatted board.
+        """
+
+        b = ArrayBoard(board_size=board_size)
+
+        if (bnf):
+            lines = string_input.split(",")
+            for i, line in enumerate(lines):
+                for j, char in enumerate(line):
+                    b.set_tile_colour(i, j, Colour.from_char(char))
+        else:
+            lines = [line.strip() for line in string_input.split("\n")]
+            for i, line in enumerate(lines):
+                chars = line.split(" ")
+                for j, char in enumerate(chars):
+                    b.set_tile_colour(i, j, Colour.from_char(char))
+
+        b.clear_history()
+        return b
+
+    def copy(self):
+        """Returns an independent copy of the board. The move history is
+        not copied, so the copy cannot undo past this position.
+        """
+
+        b = ArrayBoard.__new__(ArrayBoard)
+        b._board_size = self._board_size
+        b._cells = bytearray(self._cells)
+        b._neighbours = self._neighbours
+        b._winner = self._winner
+        b._zobrist = self._zobrist
+        b._hash = self._hash
+        b._top, b._bottom = self._top, self._bottom
+        b._left, b._right = self._left, self._right
+        b._uf = UnionFind.__new__(UnionFind)
+        b._uf.parent = self._uf.parent[:]
+        b._uf.size = self._uf.size[:]
+        b._uf.history = []
+        b._history = []
+        return b
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def has_ended(self):
+        """Checks if the game has ended. The winner is kept up to date by
+        set_tile_colour, so this is a constant-time query.
+        """
+
+        return self._winner is not None
+
+    def _connect(self, idx, code):
+        """Merges a newly coloured cell with its same-colour neighbours and
+        the virtual edge nodes it touches, then checks for a winning chain.
+        """
+
+        uf = self._uf
+        cells = self._cells
+        for n_idx in self._neighbours[idx]:
+            if cells[n_idx] == code:
+                uf.union(idx, n_idx)
+
+        x, y = divmod(idx, self._board_size)
+        last = self._board_size - 1
+
+        # Red connects top to bottom, Blue connects left to right
+        if (code == RED):
+            if (x == 0):
+                uf.union(idx, self._top)
+            if (x == last):
+                uf.union(idx, self._bottom)
+            if (uf.connected(self._top, self._bottom)):
+                self._winner = Colour.RED
+        else:
+            if (y == 0):
+                uf.union(idx, self._left)
+            if (y == last):
+                uf.union(idx, self._right)
+            if (uf.connected(self._left, self._right)):
+                self._winner = Colour.BLUE
+
+    def _rebuild(self):
+        """Recomputes all groups from scratch. Only needed when a stone is
+        removed or recoloured, which never happens during normal play.
+        """
+
+        self._uf = UnionFind(len(self._cells) + 4)
+        self._winner = None
+        self._history = []
+        self._hash = 0
+        for idx, code in enumerate(self._cells):
+            if code != EMPTY:
+                self._hash ^= self._zobrist[code][idx]
+                self._connect(idx, code)
+        self._uf.clear_history()
+
+    def undo(self):
+        """Removes the most recently placed stone."""
+
+        idx, winner, mark = self._history.pop()
+        self._hash ^= self._zobrist[self._cells[idx]][idx]
+        self._cells[idx] = EMPTY
+        self._uf.rollback(mark)
+        self._winner = winner
+
+    def undo_all(self):
+        """Removes every stone placed since the history was last cleared."""
+
+        while self._history:
+            self.undo()
+
+    def clear_history(self):
+        """Makes the current position permanent, so undo stops here."""
+
+        self._history = []
+        self._uf.clear_history()
+
+    def print_board(self, bnf=True):
+        """Returns the string representation of a board. If bnf=True, the
+        string will be formatted according to the communication protocol.
+        """
+
+        size = self._board_size
+        rows = [
+            "".join(CHARS[c] for c in self._cells[i*size:(i+1)*size])
+            for i in range(size)
+        ]
+        if (bnf):
+            return ",".join(rows)
+
+        output = ""
+        for i, row in enumerate(rows):
+            output += " " * i + " ".join(row) + " \n"
+        return output
+
+    def get_winner(self):
+        return self._winner
+
+    def get_size(self):
+        return self._board_size
+
+    def get_hash(self):
+        return self._hash
+
+    def get_cells(self) -> bytearray:
+        """Returns the flat cell buffer. Index x*size+y holds EMPTY, RED or
+        BLUE. Callers must not modify it.
+        """
+        return self._cells
+
+    def get_empty_cells(self) -> List[int]:
+        """Returns the flat indices of all empty cells."""
+        return [idx for idx, code in enumerate(self._cells) if code == EMPTY]
+
+    def get_tile_colour(self, x, y):
+        return COLOURS[self._cells[x * self._board_size + y]]
+
+    def set_tile_colour(self, x, y, colour):
+        idx = x * self._board_size + y
+        previous = self._cells[idx]
+        code = CODES[colour]
+        self._cells[idx] = code
+
+        if (previous == EMPTY):
+            if (code != EMPTY):
+                self._history.append(
+                    (idx, self._winner, len(self._uf.history)))
+                self._hash ^= self._zobrist[code][idx]
+                self._connect(idx, code)
+        elif (previous != code):
+            self._rebuild()
+
+
+if (__name__ == "__main__"):
+    b = ArrayBoard.from_string(
+        "0R000B00000,0R000000000,0RBB0000000,0R000000000,0R00B000000," +
+        "0R000BB0000,0R0000B0000,0R00000B000,0R000000B00,0R0000000B0," +
+        "0R00000000B", bnf=True
+    )
+    print(b.print_board(bnf=False))
+    print(b.has_ended(), b.get_winner())
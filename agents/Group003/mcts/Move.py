@@ -1,6 +1,8 @@
 class Move():
     """Represents a player move in a turn of Hex."""
 
+    __slots__ = ("colour", "x", "y")
+
     def __init__(self, colour, x=-1, y=-1):
         super().__init__()
 
@@ -35,9 +37,8 @@ class Move():
         return self.x == -1 and self.y == -1
 
     def move(self, b):
-        # fill the tile
-        tile = b.get_tiles()[self.x][self.y]
-        tile.set_colour(self.colour)
+        # fill the tile, keeping the board's connectivity up to date
+        b.set_tile_colour(self.x, self.y, self.colour)
 
     def get_x(self):
         return self.x
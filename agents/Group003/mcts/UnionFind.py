@@ -0,0 +1,60 @@
+from typing import List, Tuple
+
+
+class UnionFind:
+    """Disjoint-set forest used to track connected groups of stones.
+
+    Uses union by size without path compression, so find runs in
+    O(log n) and every union can be rolled back exactly. This lets a
+    board undo moves instead of being copied.
+    """
+
+    def __init__(self, n: int) -> None:
+        self.parent: List[int] = list(range(n))
+        self.size: List[int] = [1] * n
+        # (absorbed root, surviving root) for every effective union
+        self.history: List[Tuple[int, int]] = []
+
+    def find(self, x: int) -> int:
+        """Returns the representative of the set containing x."""
+
+        parent = self.parent
+        while parent[x] != x:
+            x = parent[x]
+        return x
+
+    def union(self, x: int, y: int) -> int:
+        """Merges the sets containing x and y. Returns the new
+        representative.
+        """
+
+        x = self.find(x)
+        y = self.find(y)
+        if x == y:
+            return x
+
+        if self.size[x] < self.size[y]:
+            x, y = y, x
+        self.parent[y] = x
+        self.size[x] += self.size[y]
+        self.history.append((y, x))
+        return x
+
+    def connected(self, x: int, y: int) -> bool:
+        """Checks if x and y are in the same set."""
+
+        return self.find(x) == self.find(y)
+
+    def rollback(self, mark: int) -> None:
+        """Undoes unions until only the first mark remain in history."""
+
+        history = self.history
+        while len(history) > mark:
+            y, x = history.pop()
+            self.parent[y] = y
+            self.size[x] -= self.size[y]
+
+    def clear_history(self) -> None:
+        """Forgets recorded unions, making the current state permanent."""
+
+        self.history = []
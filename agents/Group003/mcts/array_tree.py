@@ -0,0 +1,236 @@
+from __future__ import annotations
+import math
+import random
+import time
+from typing import Dict, List, Tuple
+import numpy as np
+from mcts.ArrayBoard import ArrayBoard
+from mcts.Colour import Colour
+from mcts.playout import fill_playout
+from mcts.fresh_tree import FreshTreeSearch
+
+# expansion states of a node
+LEAF = 0
+EXPANDING = 1
+EXPANDED = 2
+
+# (name, dtype) of every per-node array, largest items first so each array
+# stays aligned when packed into one buffer. 35 bytes per node.
+FIELDS = (
+    ("N", np.int64),            # visits
+    ("Q", np.float64),          # reward for the player who moved in
+    ("parent", np.int32),
+    ("first_child", np.int32),  # children are stored contiguously
+    ("n_children", np.int32),
+    ("virtual", np.int32),      # workers currently below this node
+    ("move", np.int16),         # flat index of the incoming move
+    ("state", np.int8),
+)
+
+
+class ArrayTree:
+    '''
+    Search tree stored as one NumPy array per statistic, with nodes
+    referred to by integer index. Node 0 is the root. All children of a
+    node are allocated as one contiguous block, found through first_child
+    and n_children, so choosing a child is one vectorised UCB evaluation
+    over a slice. The arrays double in size when full.
+    '''
+    def __init__(self, capacity: int = 1 << 16) -> None:
+        self.capacity = capacity
+        self.next_free = np.zeros(1, dtype=np.int64)
+        for name, dtype in FIELDS:
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+        self.reset()
+
+    def reset(self) -> None:
+        '''
+        Clears the tree down to an unexpanded root.
+        '''
+        self.next_free[0] = 1
+        self.N[0] = 0
+        self.Q[0] = 0
+        self.parent[0] = -1
+        self.first_child[0] = -1
+        self.n_children[0] = 0
+        self.virtual[0] = 0
+        self.move[0] = -1
+        self.state[0] = LEAF
+
+    def reserve(self, node: int, count: int) -> int:
+        '''
+        Marks node as being expanded and allocates count children for it.
+        Returns the index of the first child, or -1 if node is not a leaf.
+        '''
+        if self.state[node] != LEAF:
+            return -1
+
+        first = int(self.next_free[0])
+        if first + count > self.capacity:
+            capacity = max(2 * self.capacity, first + count)
+            for name, _ in FIELDS:
+                array = getattr(self, name)
+                grown = np.zeros(capacity, dtype=array.dtype)
+                grown[:self.capacity] = array
+                setattr(self, name, grown)
+            self.capacity = capacity
+
+        self.next_free[0] = first + count
+        self.state[node] = EXPANDING
+        return first
+
+    def expand(self, node: int, moves: List[int]) -> bool:
+        '''
+        Allocates one child per move under node. Returns False if the node
+        could not be expanded.
+        '''
+        first = self.reserve(node, len(moves))
+        if first < 0:
+            return False
+
+        block = slice(first, first + len(moves))
+        self.N[block] = 0
+        self.Q[block] = 0
+        self.parent[block] = node
+        self.first_child[block] = -1
+        self.n_children[block] = 0
+        self.virtual[block] = 0
+        self.move[block] = moves
+        self.state[block] = LEAF
+
+        self.first_child[node] = first
+        self.n_children[node] = len(moves)
+        self.state[node] = EXPANDED
+        return True
+
+    def add_virtual(self, nodes: List[int], count: int) -> None:
+        '''
+        Adds count virtual losses to every node in nodes, which must not
+        repeat.
+        '''
+        self.virtual[nodes] += count
+
+    def select(self, node: int, c: float) -> int:
+        '''
+        Returns the child of node with the highest UCB value. Virtual losses
+        count as extra lost visits so concurrent workers spread out over
+        different paths. Unvisited children are tried first.
+        '''
+        first = self.first_child[node]
+        block = slice(first, first + self.n_children[node])
+
+        virtual = self.virtual[block]
+        n = self.N[block] + virtual
+        q = self.Q[block] - virtual
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log_parent = math.log(max(self.N[node] + self.virtual[node], 1))
+            ucb = q / n + 2 * c * np.sqrt(2 * log_parent / n)
+        ucb[n == 0] = np.inf
+
+        return first + int(np.argmax(ucb))
+
+    def root_stats(self) -> Dict[int, Tuple[int, float]]:
+        '''
+        Returns {move: (N, Q)} for the children of the root.
+        '''
+        first = self.first_child[0]
+        if first < 0:
+            return {}
+        block = slice(first, first + self.n_children[0])
+        return {
+            int(m): (int(n), float(q))
+            for m, n, q in zip(self.move[block], self.N[block], self.Q[block])
+        }
+
+    def size(self) -> int:
+        return int(self.next_free[0])
+
+
+def grow_tree(
+    tree: ArrayTree,
+    board: ArrayBoard,
+    colour: Colour,
+    time_limit: float,
+    c: float,
+    rng: random.Random,
+    virtual_loss: bool = False
+) -> int:
+    '''
+    Runs UCT iterations on tree until time_limit elapses. board holds the
+    root position, with colour to move, and is restored after every
+    iteration. With virtual_loss, every node on the selected path counts
+    as a loss from the end of the selection until its backup. This is
+    only needed when several processes share the tree. Returns the number
+    of iterations done.
+    '''
+    board_size = board.get_size()
+    t0 = time.time()
+
+    iterations = 0
+    while time_limit > (time.time() - t0):
+        node = 0
+        to_move = colour
+        path = [0]
+
+        # selection
+        while tree.state[node] == EXPANDED and not board.has_ended():
+            node = tree.select(node, c)
+            path.append(node)
+            x, y = divmod(int(tree.move[node]), board_size)
+            board.set_tile_colour(x, y, to_move)
+            to_move = to_move.opposite()
+
+        # expansion once a leaf has been visited before
+        if not board.has_ended() and (node == 0 or tree.N[node] > 0):
+            moves = board.get_empty_cells()
+            rng.shuffle(moves)
+            if tree.expand(node, moves):
+                node = int(tree.first_child[node])
+                path.append(node)
+                x, y = divmod(int(tree.move[node]), board_size)
+                board.set_tile_colour(x, y, to_move)
+                to_move = to_move.opposite()
+
+        if virtual_loss:
+            tree.add_virtual(path[1:], 1)
+
+        winner, _ = fill_playout(board, to_move, rng)
+
+        # backup
+        mover = to_move.opposite()
+        for v in reversed(path):
+            tree.N[v] += 1
+            tree.Q[v] += 1 if winner == mover else -1
+            mover = mover.opposite()
+        if virtual_loss:
+            tree.add_virtual(path[1:], -1)
+
+        board.undo_all()
+        iterations += 1
+
+    return iterations
+
+
+class ArrayUCT(FreshTreeSearch):
+    '''
+    UCT search over an ArrayTree instead of Node objects. The tree is kept
+    and reset between moves, so its arrays are only allocated once.
+    '''
+    def __init__(self, board_size: int = 11, colour: Colour = Colour.BLUE, c: int = 1/math.sqrt(2), capacity: int = 1 << 16):
+        super().__init__(board_size, colour)
+        self.c = c
+        self.tree = ArrayTree(capacity)
+        self.rng = random.Random()
+
+    def grow(self, state: str) -> Dict[int, Tuple[int, float]]:
+        '''
+        Searches from state on a fresh tree and returns the root children
+        statistics as {move: (N, Q)}.
+        '''
+        self.tree.reset()
+        board = ArrayBoard.from_string(state, self.board_size)
+        self.iterations = grow_tree(
+            self.tree, board, self.colour, self.TIME, self.c, self.rng
+        )
+        return self.tree.root_stats()
@@ -0,0 +1,65 @@
+from __future__ import annotations
+import numpy as np
+from mcts.ArrayBoard import RED, BLUE, CODES
+from mcts.Colour import Colour
+
+
+def red_connects_batch(red: np.ndarray) -> np.ndarray:
+    """Checks, for a (K, n, n) boolean array of red stones, which of the K
+    boards have a red chain from the top row to the bottom row.
+
+    The set of red cells reachable from the top row is grown by hex
+    dilation until it stops changing, so all K boards are resolved by the
+    same handful of NumPy operations.
+    """
+
+    reach = np.zeros_like(red)
+    reach[:, 0, :] = red[:, 0, :]
+
+    while True:
+        grow = reach.copy()
+        # neighbours (-1, 0), (1, 0), (0, -1), (0, 1), (-1, 1), (1, -1)
+        grow[:, 1:, :] |= reach[:, :-1, :]
+        grow[:, :-1, :] |= reach[:, 1:, :]
+        grow[:, :, 1:] |= reach[:, :, :-1]
+        grow[:, :, :-1] |= reach[:, :, 1:]
+        grow[:, 1:, :-1] |= reach[:, :-1, 1:]
+        grow[:, :-1, 1:] |= reach[:, 1:, :-1]
+        grow &= red
+
+        if np.array_equal(grow, reach):
+            break
+        reach = grow
+
+    return reach[:, -1, :].any(axis=1)
+
+
+def batch_playout(
+    board,
+    colour: Colour,
+    k: int,
+    rng: np.random.Generator
+) -> np.ndarray:
+    """Plays k uniformly random completions of the board at once.
+
+    Every completion hands a random half of the empty cells (rounded up)
+    to the player to move, which is the final position of a random
+    alternating playout. Returns a (k, n, n) int8 array of the filled
+    boards. Use red_connects_batch to resolve the winners.
+    """
+
+    size = board.get_size()
+    base = np.frombuffer(bytes(board.get_cells()), dtype=np.int8)
+    cells = np.tile(base, (k, 1))
+
+    empty = np.flatnonzero(base == 0)
+    if len(empty):
+        order = rng.random((k, len(empty))).argsort(axis=1)
+        split = (len(empty) + 1) // 2
+        rows = np.arange(k)[:, None]
+
+        mover = CODES[colour]
+        cells[rows, empty[order[:, :split]]] = mover
+        cells[rows, empty[order[:, split:]]] = RED if mover == BLUE else BLUE
+
+    return cells.reshape(k, size, size)
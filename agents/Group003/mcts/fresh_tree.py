@@ -0,0 +1,66 @@
+from __future__ import annotations
+import random
+from abc import ABC, abstractmethod
+from typing import Dict, Sequence
+from mcts.Colour import Colour
+
+
+class FreshTreeSearch(ABC):
+    '''
+    Base of the searchers that build a new tree for every move. Gives them
+    the board_size, colour, TIME and search attributes of UCT, and the
+    advance, ponder and close calls the agent makes on any searcher.
+    Nothing is kept between moves, so following the game and pondering
+    have nothing to do.
+
+    Subclasses implement grow(state), and override choose if the
+    statistics hold more than N and Q.
+    '''
+    def __init__(self, board_size: int, colour: Colour) -> None:
+        self.board_size = board_size
+        self.colour = colour
+        self.TIME = 9
+        self.iterations = 0
+
+    def search(self, state: str) -> bytes:
+        stats = self.grow(state)
+        # a search that finished no iteration has nothing to choose from
+        if not stats:
+            return self.any_move(state)
+
+        x, y = divmod(self.choose(stats), self.board_size)
+        return bytes(f"{x},{y}\n", "utf-8")
+
+    @abstractmethod
+    def grow(self, state: str) -> Dict[int, Sequence[float]]:
+        '''
+        Searches from state on a fresh tree and returns the root children
+        statistics as {flat move index: (N, Q, ...)}.
+        '''
+
+    def choose(self, stats: Dict[int, Sequence[float]]) -> int:
+        '''
+        Returns the move to play from the statistics of grow: the most
+        visited.
+        '''
+        return max(stats, key=lambda move: stats[move][0])
+
+    def any_move(self, state: str) -> bytes:
+        '''
+        Returns a random empty cell of the protocol board string state, for
+        when a search came back with no statistics to choose from.
+        '''
+        # the agent sends an empty string for the empty board
+        cells = state.replace(",", "") or "0" * self.board_size ** 2
+        empty = [idx for idx, char in enumerate(cells) if char == "0"]
+        x, y = divmod(random.choice(empty), self.board_size)
+        return bytes(f"{x},{y}\n", "utf-8")
+
+    def advance(self, x: int, y: int) -> None:
+        pass
+
+    def ponder(self, iterations: int) -> bool:
+        return False
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,136 @@
+from __future__ import annotations
+from typing import Dict, Set, Tuple
+from mcts.ArrayBoard import EMPTY, RED, BLUE
+from mcts.Tile import Tile
+
+# Ring entry for an off-board neighbour beyond a corner, which belongs to
+# neither player's edge
+NEITHER = 3
+
+_ring_tables = {}
+
+
+def ring_table(board_size: int) -> Tuple[Tuple[int, ...], ...]:
+    """Returns, for every flat cell index, its six neighbours in clockwise
+    order. On-board neighbours are flat indices. Off-board ones are stored
+    negated as the colour code of the edge they lie on: rows beyond the top
+    and bottom are red's edges, columns beyond the sides are blue's.
+    """
+
+    table = _ring_tables.get(board_size)
+    if table is None:
+        rows = []
+        for x in range(board_size):
+            for y in range(board_size):
+                ring = []
+                for idx in range(Tile.NEIGHBOUR_COUNT):
+                    x_n = x + Tile.I_DISPLACEMENTS[idx]
+                    y_n = y + Tile.J_DISPLACEMENTS[idx]
+                    x_in = 0 <= x_n < board_size
+                    y_in = 0 <= y_n < board_size
+                    if x_in and y_in:
+                        ring.append(x_n * board_size + y_n)
+                    elif y_in:
+                        ring.append(-RED)
+                    elif x_in:
+                        ring.append(-BLUE)
+                    else:
+                        ring.append(-NEITHER)
+                rows.append(tuple(ring))
+        table = tuple(rows)
+        _ring_tables[board_size] = table
+    return table
+
+
+def is_dead(cells: bytearray, ring: Tuple[int, ...]) -> bool:
+    """Checks if an empty cell with the given neighbour ring is dead: no
+    stone there can ever change the winner. Neighbours next to each other
+    in the ring touch, so a run of stones along the ring is one group.
+    The cell is dead when its ring holds four adjacent stones of one
+    colour, or three adjacent of one colour next to two adjacent of the
+    other. Edges count as stones of their owner.
+    """
+
+    colours = [cells[n] if n >= 0 else -n for n in ring]
+    colours += colours
+
+    for start in range(6):
+        colour = colours[start]
+        if colour != RED and colour != BLUE:
+            continue
+        if colours[start + 1] != colour or colours[start + 2] != colour:
+            continue
+
+        if colours[start + 3] == colour:
+            return True
+        other = BLUE if colour == RED else RED
+        if colours[start + 4] == other and (
+                colours[start + 3] == other or colours[start + 5] == other):
+            return True
+
+    return False
+
+
+def _stones_around(cells: bytearray, ring: Tuple[int, ...]) -> int:
+    return sum(
+        1 for n in ring
+        if (cells[n] if n >= 0 else -n) in (RED, BLUE)
+    )
+
+
+def analyse(board) -> Tuple[Set[int], Dict[int, int]]:
+    """Finds the inferior cells of a position.
+
+    Returns the dead cells, and the captured cells as {cell: colour code}.
+    Two adjacent empty cells are captured by a colour if that colour
+    taking either of them makes the other dead: whatever the opponent
+    plays in the pair is answered in the other cell, so the capturer
+    effectively owns both. Captured pairs are kept disjoint, as overlapping
+    pairs cannot all be answered.
+
+    Neither kind of cell is worth a move for either player: a dead stone
+    changes nothing, and a stone in a captured pair gains at most what the
+    capturer already has.
+    """
+
+    size = board.get_size()
+    rings = ring_table(size)
+    cells = bytearray(board.get_cells())
+
+    dead = set()
+    # Dead cells have at least four stones or edges around them, so a cell
+    # can only become dead with one more stone beside it if it already has
+    # three
+    crowded = set()
+    for idx in board.get_empty_cells():
+        ring = rings[idx]
+        stones = _stones_around(cells, ring)
+        if stones >= 4 and is_dead(cells, ring):
+            dead.add(idx)
+        elif stones >= 3:
+            crowded.add(idx)
+
+    captured: Dict[int, int] = {}
+    for a in sorted(crowded):
+        if a in captured:
+            continue
+        for b in rings[a]:
+            if b <= a or b not in crowded or b in captured:
+                continue
+            for colour in (RED, BLUE):
+                cells[a] = colour
+                b_dead = is_dead(cells, rings[b])
+                cells[a] = EMPTY
+                if not b_dead:
+                    continue
+                cells[b] = colour
+                a_dead = is_dead(cells, rings[a])
+                cells[b] = EMPTY
+                if a_dead:
+                    captured[a] = colour
+                    captured[b] = colour
+                    break
+            if a in captured:
+                break
+
+    return dead, captured
@@ -1,35 +1,63 @@
 from __future__ import annotations
-from copy import deepcopy
 from typing import List
 from mcts.Board import Board
 from mcts.Move import Move
 from mcts.Colour import Colour
+from mcts.transposition import Stats
+
+# Game-theoretic value of a node for the player who moved into it
+UNKNOWN = 0
+WIN = 1
+LOSS = -1
 
 class Node:
 
-    # Look into type of state.
+    __slots__ = (
+        "parent", "a", "N", "Q", "colour", "AN", "AQ", "tt", "children",
+        "untried", "proven", "captured", "vc_checked"
+    )
+
+    # Nodes hold no board. The position is rebuilt by replaying the
+    # incoming actions from the root onto a scratch board.
     def __init__(
         self,
         parent: Node,
         action: Move,
-        state: Board,
         colour: Colour,
     ) -> None:
         self.parent = parent
 
-        # Associated node
-        self.s = state
         # Incoming action
         self.a = action
         # How many times node has been passed through.
         self.N = 0
-        # Reward function, accumulated reward.
+        # Reward function, accumulated reward for the player who made the
+        # incoming action.
         self.Q = 0
-        # Player who made the incoming action leading to these node
+        # Player to move in this node
         self.colour = colour
+        # All-moves-as-first visits and reward for the incoming action,
+        # counted whenever a playout through the parent gave its mover
+        # this cell
+        self.AN = 0
+        self.AQ = 0
+        # Statistics shared with transpositions of this position, if the
+        # search uses a transposition table
+        self.tt: Stats = None
 
         # List of all children
         self.children: List[Node] = []
+        # Flat indices of the moves not expanded yet. Built the first time
+        # the node is expanded, so unexpanded leaves stay small.
+        self.untried: List[int] = None
+        # WIN or LOSS once the search has solved the node, for the player
+        # who made the incoming action
+        self.proven = UNKNOWN
+        # Captured cells of the position as {cell: colour code}, found
+        # once when the untried pool is built, if the search needs them
+        self.captured = None
+        # Whether the node was looked up for virtual connections
+        self.vc_checked = False
     
     def get_children(self) -> List[Node]:
         '''
@@ -37,11 +65,13 @@ class Node:
         '''
         return self.children
 
-    def get_valid_actions(self, board_size: int, colour: Colour) -> List[Move]:
+    def get_valid_actions(self, board: Board, colour: Colour) -> List[Move]:
         '''
-        Returns the list of all possible moves.
+        Returns the list of all possible moves on the given board, which
+        must hold this node's position.
         '''
 
+        board_size = board.get_size()
         all_moves: List[Move] = [] # Stores all moves
         valid_moves: List[Move] = [] # Stores valid moves
 
@@ -51,10 +81,8 @@ class Node:
                 all_moves.append(Move(colour=colour, x=x, y=y))
         
         for m in all_moves:
-            # Get the corresponding tile
-            tile = self.s.get_tiles()[m.x][m.y]
             # Check if tile is not occupied
-            if tile.get_colour() is None:
+            if board.get_tile_colour(m.x, m.y) is None:
                 valid_moves.append(m)
                 
         return valid_moves
\ No newline at end of file
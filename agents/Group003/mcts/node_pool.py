@@ -0,0 +1,42 @@
+from __future__ import annotations
+from typing import List
+from mcts.node import Node
+from mcts.Move import Move
+from mcts.Colour import Colour
+
+
+class NodePool:
+    '''
+    Fixed set of Node objects, created up front and recycled, so a search
+    tree never holds more than capacity nodes and the memory it takes is
+    known before the game starts.
+    '''
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.free: List[Node] = [Node(None, None, None) for _ in range(capacity)]
+
+    def allocate(self, parent: Node, action: Move, colour: Colour) -> Node:
+        '''
+        Returns a fresh node from the pool, or None if the pool is used up.
+        '''
+        if not self.free:
+            return None
+        node = self.free.pop()
+        node.__init__(parent, action, colour)
+        return node
+
+    def release(self, node: Node) -> None:
+        '''
+        Returns node and its whole subtree to the pool.
+        '''
+        stack = [node]
+        while stack:
+            v = stack.pop()
+            stack.extend(v.children)
+            v.children = []
+            v.parent = None
+            v.tt = None
+            self.free.append(v)
+
+    def in_use(self) -> int:
+        return self.capacity - len(self.free)
@@ -0,0 +1,72 @@
+from __future__ import annotations
+import random
+from typing import Dict, Tuple
+from mcts.ArrayBoard import RED, BLUE, CODES, neighbour_table
+from mcts.Colour import Colour
+
+
+def red_connects(cells: bytearray, board_size: int) -> bool:
+    """Checks if the red stones in a flat cell buffer join the top row to
+    the bottom row. Iterative flood fill, so large boards are safe.
+    """
+
+    neighbours = neighbour_table(board_size)
+    last_row = board_size * (board_size - 1)
+    seen = bytearray(len(cells))
+
+    stack = []
+    for idx in range(board_size):
+        if cells[idx] == RED:
+            seen[idx] = 1
+            stack.append(idx)
+
+    while stack:
+        idx = stack.pop()
+        if idx >= last_row:
+            return True
+        for n_idx in neighbours[idx]:
+            if not seen[n_idx] and cells[n_idx] == RED:
+                seen[n_idx] = 1
+                stack.append(n_idx)
+
+    return False
+
+
+def fill_playout(
+    board,
+    colour: Colour,
+    rng: random.Random = random,
+    fixed: Dict[int, int] = None
+) -> Tuple[Colour, bytearray]:
+    """Plays a uniformly random game to the end in one go.
+
+    A full Hex board always has exactly one winner, and the final position
+    of a random playout is just a random split of the empty cells with the
+    mover getting the first, third, ... of them. So the empty cells are
+    shuffled once, assigned alternately and resolved with a single
+    connectivity check. Cells in fixed, a {cell: colour code} map, are
+    given their colour before the rest are shared out. Returns the winner
+    and the filled cell buffer. The board itself is left untouched.
+    """
+
+    cells = bytearray(board.get_cells())
+    if board.has_ended():
+        return board.get_winner(), cells
+
+    empty = board.get_empty_cells()
+    if fixed:
+        for idx, code in fixed.items():
+            cells[idx] = code
+        empty = [idx for idx in empty if idx not in fixed]
+    rng.shuffle(empty)
+
+    mover = CODES[colour]
+    other = RED if mover == BLUE else BLUE
+    for idx in empty[0::2]:
+        cells[idx] = mover
+    for idx in empty[1::2]:
+        cells[idx] = other
+
+    if red_connects(cells, board.get_size()):
+        return Colour.RED, cells
+    return Colour.BLUE, cells
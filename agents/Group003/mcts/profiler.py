@@ -0,0 +1,75 @@
+from __future__ import annotations
+import json
+import time
+from typing import TextIO
+
+
+class SearchProfile:
+    '''
+    Time and call counts for each phase of the UCT loop during one search,
+    with the shape of the tree it built. Counting costs a few
+    perf_counter calls per iteration, so it is always on.
+    '''
+    PHASES = ("selection", "expansion", "rollout", "backup")
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.calls = dict.fromkeys(self.PHASES, 0)
+        self.seconds = dict.fromkeys(self.PHASES, 0.0)
+        self.iterations = 0
+        self.playouts = 0
+        # empty cells left at the leaves that were simulated
+        self.rollout_cells = 0
+        self.max_depth = 0
+        self.started = time.perf_counter()
+        self.elapsed = None
+
+    def finish(self) -> None:
+        '''
+        Stops the search clock.
+        '''
+        self.elapsed = time.perf_counter() - self.started
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.calls[phase] += 1
+        self.seconds[phase] += seconds
+
+    def report(self, **extra) -> dict:
+        '''
+        Returns the counters as a dictionary, with extra fields added.
+        Selection time excludes the expansion done inside it.
+        '''
+        elapsed = self.elapsed
+        if elapsed is None:
+            elapsed = time.perf_counter() - self.started
+        seconds = dict(self.seconds)
+        seconds["selection"] -= seconds["expansion"]
+
+        report = dict(extra)
+        report.update({
+            "elapsed": round(elapsed, 4),
+            "iterations": self.iterations,
+            "iterations_per_sec": round(self.iterations / max(elapsed, 1e-9), 1),
+            "playouts": self.playouts,
+            "avg_rollout_length": round(
+                self.rollout_cells / max(self.calls["rollout"], 1), 2
+            ),
+            "max_depth": self.max_depth,
+            "phases": {
+                phase: {
+                    "calls": self.calls[phase],
+                    "seconds": round(seconds[phase], 4),
+                }
+                for phase in self.PHASES
+            },
+        })
+        return report
+
+    def write(self, out: TextIO, **extra) -> None:
+        '''
+        Writes the report to out as one JSON line.
+        '''
+        out.write(json.dumps(self.report(**extra)) + "\n")
+        out.flush()
@@ -0,0 +1,48 @@
+from __future__ import annotations
+import zlib
+
+
+class ProtocolBoard:
+    '''
+    The board string of the engine protocol, kept up to date move by move.
+
+    In the delta protocol the engine's CHANGE messages carry only the move,
+    so the agent rebuilds the board string itself. It is the rows of R, B
+    and 0 joined by commas, held as bytes so a move patches one character
+    in place. Every few turns the engine sends a CRC32 of its own string,
+    which matches() checks against.
+    '''
+    def __init__(self, board_size: int) -> None:
+        self.board_size = board_size
+        row = b"0" * board_size
+        self.cells = bytearray(b",".join([row] * board_size))
+
+    def play(self, x: int, y: int, char: str) -> None:
+        '''
+        Puts a stone of colour char, R or B, on x,y.
+        '''
+        self.cells[x * (self.board_size + 1) + y] = ord(char)
+
+    def set(self, string: str) -> None:
+        '''
+        Replaces the board with a full board string from the engine.
+        '''
+        self.cells = bytearray(string.encode())
+
+    def string(self) -> str:
+        return self.cells.decode()
+
+    def __str__(self) -> str:
+        return self.string()
+
+    def checksum(self) -> str:
+        return f"{zlib.crc32(self.cells):08x}"
+
+    def matches(self, field: str) -> bool:
+        '''
+        Checks the board against the checksum field of a delta CHANGE
+        message, "#" followed by the hex CRC32 or nothing on turns without
+        a check.
+        '''
+        digest = field[1:]
+        return digest == "" or digest == self.checksum()
@@ -0,0 +1,115 @@
+from __future__ import annotations
+import math
+import random
+import time
+import multiprocessing
+from typing import Dict, List, Tuple
+from mcts.uct_algorithm import UCT
+from mcts.node import UNKNOWN, WIN, LOSS
+from mcts.Colour import Colour
+from mcts.fresh_tree import FreshTreeSearch
+
+# UCT instance owned by each worker process
+_worker_uct: UCT = None
+
+# Seconds a result may arrive after the deadline of its search before the
+# move goes ahead without it
+RESULT_GRACE = 0.5
+
+
+def _init_worker(uct_kwargs: dict) -> None:
+    global _worker_uct
+    _worker_uct = UCT(**uct_kwargs)
+
+
+def _search_worker(
+    args: Tuple[str, int, Colour, float, int]
+) -> Dict[int, Tuple[int, int, int]]:
+    '''
+    Runs one independent search until the deadline, a time.time() value,
+    and returns the root children statistics as {move: (N, Q, proven)}.
+    A worker that picks up a job late only gets what is left of the time.
+    '''
+    state, board_size, colour, deadline, seed = args
+
+    uct = _worker_uct
+    uct.board_size = board_size
+    uct.colour = colour
+    uct.TIME = max(deadline - time.time(), 0)
+    uct.seed(seed)
+
+    v0 = uct.build_tree(state)
+    return {
+        child.a.x * board_size + child.a.y: (child.N, child.Q, child.proven)
+        for child in v0.children
+    }
+
+
+class RootParallelUCT(FreshTreeSearch):
+    '''
+    Root-parallel search: every worker grows its own UCT tree from the same
+    position with a different seed, then the root children statistics are
+    summed. As in UCT.final_child, a move any worker proved won is played,
+    otherwise the most visited move not proven lost.
+
+    The pool is created once and reused for every move, so no process is
+    spawned while the clock is running. Every search shares one deadline,
+    so the move takes no longer than one search even if a worker ends up
+    with two jobs.
+    '''
+    def __init__(self, workers: int, board_size: int = 11, colour: Colour = Colour.BLUE, c: int = 1/math.sqrt(2), **uct_kwargs):
+        super().__init__(board_size, colour)
+        self.workers = workers
+
+        uct_kwargs["board_size"] = board_size
+        uct_kwargs["colour"] = colour
+        uct_kwargs["c"] = c
+        self.pool = multiprocessing.Pool(
+            workers, initializer=_init_worker, initargs=(uct_kwargs,)
+        )
+
+    def choose(self, stats: Dict[int, List[int]]) -> int:
+        for move, (_, _, proven) in stats.items():
+            if proven == WIN:
+                return move
+
+        candidates = [move for move in stats if stats[move][2] != LOSS]
+        return max(candidates or stats, key=lambda move: stats[move][0])
+
+    def grow(self, state: str) -> Dict[int, List[int]]:
+        '''
+        Runs one search per worker and returns the summed root children
+        statistics as {move: [N, Q, proven]}. Proofs hold whichever
+        worker found them, so a move proven by any worker is proven. A
+        search that fails or is late is left out, so the result is empty
+        if none came back.
+        '''
+        deadline = time.time() + self.TIME
+        pending = [
+            self.pool.apply_async(_search_worker, ((
+                state, self.board_size, self.colour, deadline,
+                random.getrandbits(32)
+            ),))
+            for _ in range(self.workers)
+        ]
+
+        merged: Dict[int, List[int]] = {}
+        for job in pending:
+            try:
+                result = job.get(
+                    max(deadline - time.time(), 0) + RESULT_GRACE
+                )
+            except Exception:
+                continue
+            for move, (n, q, proven) in result.items():
+                entry = merged.setdefault(move, [0, 0, UNKNOWN])
+                entry[0] += n
+                entry[1] += q
+                if proven:
+                    entry[2] = proven
+
+        return merged
+
+    def close(self) -> None:
+        self.pool.terminate()
+        self.pool.join()
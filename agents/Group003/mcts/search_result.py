@@ -0,0 +1,35 @@
+from __future__ import annotations
+from typing import Dict, Tuple
+
+
+class SearchResult:
+    '''
+    Outcome of one search: the chosen move, the root children statistics
+    as {(x, y): (N, Q)} with Q from the mover's point of view, and how
+    much work was done.
+    '''
+    __slots__ = ("move", "stats", "iterations", "playouts", "elapsed")
+
+    def __init__(
+        self,
+        move: Tuple[int, int],
+        stats: Dict[Tuple[int, int], Tuple[int, float]],
+        iterations: int,
+        playouts: int,
+        elapsed: float
+    ) -> None:
+        self.move = move
+        self.stats = stats
+        self.iterations = iterations
+        self.playouts = playouts
+        self.elapsed = elapsed
+
+    def to_bytes(self) -> bytes:
+        '''
+        Returns the move as a protocol message.
+        '''
+        x, y = self.move
+        return bytes(f"{x},{y}\n", "utf-8")
+
+    def playouts_per_second(self) -> float:
+        return self.playouts / max(self.elapsed, 1e-9)
@@ -0,0 +1,147 @@
+from __future__ import annotations
+import math
+import random
+import time
+import multiprocessing
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple
+import numpy as np
+from mcts.ArrayBoard import ArrayBoard
+from mcts.Colour import Colour
+from mcts.array_tree import ArrayTree, FIELDS, LEAF, EXPANDING, grow_tree
+from mcts.fresh_tree import FreshTreeSearch
+
+
+def tree_nbytes(capacity: int) -> int:
+    '''
+    Returns the shared buffer size needed for capacity nodes, including the
+    allocation counter at the front.
+    '''
+    return 8 + sum(np.dtype(dtype).itemsize * capacity for _, dtype in FIELDS)
+
+
+class SharedTree(ArrayTree):
+    '''
+    ArrayTree whose arrays live inside a multiprocessing.shared_memory
+    buffer, so every worker process reads and grows the same tree. The
+    capacity is fixed; once it is used up, leaves are no longer expanded.
+
+    Allocation, expansion and virtual losses go through lock. N and Q
+    updates are plain NumPy writes without locking; the rare lost update
+    from two workers racing on one node is one playout lost, accepted in
+    exchange for lock-free backups. A lost virtual loss update would
+    never be undone and would bias selection for the rest of the move,
+    so those are locked.
+    '''
+    def __init__(self, shm: shared_memory.SharedMemory, capacity: int, lock) -> None:
+        self.shm = shm
+        self.capacity = capacity
+        self.lock = lock
+
+        buf = shm.buf
+        self.next_free = np.ndarray((1,), dtype=np.int64, buffer=buf)
+        offset = 8
+        for name, dtype in FIELDS:
+            array = np.ndarray((capacity,), dtype=dtype, buffer=buf, offset=offset)
+            setattr(self, name, array)
+            offset += array.nbytes
+
+    def create(capacity: int, lock) -> SharedTree:
+        shm = shared_memory.SharedMemory(create=True, size=tree_nbytes(capacity))
+        return SharedTree(shm, capacity, lock)
+
+    def attach(name: str, capacity: int, lock) -> SharedTree:
+        # worker processes share the parent's resource tracker, so only
+        # the parent's unlink removes the segment
+        shm = shared_memory.SharedMemory(name=name)
+        return SharedTree(shm, capacity, lock)
+
+    def reserve(self, node: int, count: int) -> int:
+        with self.lock:
+            if self.state[node] != LEAF:
+                return -1
+            first = int(self.next_free[0])
+            if first + count > self.capacity:
+                return -1
+            self.next_free[0] = first + count
+            self.state[node] = EXPANDING
+            return first
+
+    def add_virtual(self, nodes: List[int], count: int) -> None:
+        with self.lock:
+            self.virtual[nodes] += count
+
+    def close(self) -> None:
+        self.shm.close()
+
+
+# tree and settings owned by each worker process
+_worker_tree: SharedTree = None
+_worker_c: float = 1/math.sqrt(2)
+
+
+def _init_worker(name: str, capacity: int, lock, c: float) -> None:
+    global _worker_tree, _worker_c
+    _worker_tree = SharedTree.attach(name, capacity, lock)
+    _worker_c = c
+
+
+def _grow_worker(args: Tuple[str, int, Colour, float, int]) -> int:
+    '''
+    Grows the shared tree from state until the deadline, a time.time()
+    value. Returns the number of iterations done by this worker.
+    '''
+    state, board_size, colour, deadline, seed = args
+    board = ArrayBoard.from_string(state, board_size)
+    time_limit = max(deadline - time.time(), 0)
+    return grow_tree(
+        _worker_tree, board, colour, time_limit, _worker_c,
+        random.Random(seed), virtual_loss=True
+    )
+
+
+class TreeParallelUCT(FreshTreeSearch):
+    '''
+    Tree-parallel search: worker processes grow one shared tree at the same
+    time, kept apart by virtual loss. The shared buffer and the pool are
+    created once and reused for every move. Every worker stops at one
+    shared deadline, so a worker that picks up a job late does not make
+    the move longer.
+
+    There is no measured scaling result for this search: how much more
+    it finds with more workers, given the locking and the lost updates,
+    has not been benchmarked.
+    '''
+    def __init__(self, workers: int, board_size: int = 11, colour: Colour = Colour.BLUE, c: int = 1/math.sqrt(2), capacity: int = 1_000_000):
+        super().__init__(board_size, colour)
+        self.workers = workers
+
+        lock = multiprocessing.Lock()
+        self.tree = SharedTree.create(capacity, lock)
+        self.pool = multiprocessing.Pool(
+            workers, initializer=_init_worker,
+            initargs=(self.tree.shm.name, capacity, lock, c)
+        )
+
+    def grow(self, state: str) -> Dict[int, Tuple[int, float]]:
+        '''
+        Runs all workers on a fresh shared tree and returns the root
+        children statistics as {move: (N, Q)}.
+        '''
+        self.tree.reset()
+        deadline = time.time() + self.TIME
+        jobs = [
+            (state, self.board_size, self.colour, deadline,
+             random.getrandbits(32))
+            for _ in range(self.workers)
+        ]
+        self.iterations = sum(
+            self.pool.map(_grow_worker, jobs, chunksize=1)
+        )
+        return self.tree.root_stats()
+
+    def close(self) -> None:
+        self.pool.terminate()
+        self.pool.join()
+        self.tree.close()
+        self.tree.shm.unlink()
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+
+class TimeManager:
+    '''
+    Splits the match clock between moves.
+
+    The engine gives each player a fixed total time for the whole match
+    (Game.MAXIMUM_TIME, 5 minutes), not a fixed time per move. The manager
+    keeps its own copy of that clock from the measured duration of every
+    move. It gives each move an equal share of what is left over the moves
+    still expected, with a safety reserve held back and an emergency floor
+    once the clock runs low.
+    '''
+    def __init__(
+        self,
+        total_time: float = 300.0,
+        reserve: float = 10.0,
+        floor: float = 0.05,
+        max_budget: float = 20.0,
+        min_moves_left: int = 5
+    ) -> None:
+        # whole-match clock in seconds, and the part never planned for
+        self.total_time = total_time
+        self.reserve = reserve
+        # smallest and largest search time handed out for one move
+        self.floor = floor
+        self.max_budget = max_budget
+        self.min_moves_left = min_moves_left
+
+        self.used = 0.0
+        self.moves = 0
+        # measured move time beyond the search budget: parsing, sending,
+        # tree bookkeeping
+        self.overhead = 0.0
+        self.last_budget = None
+
+    def remaining(self) -> float:
+        return self.total_time - self.used
+
+    def moves_left(self, empty_cells: int) -> int:
+        '''
+        Estimates how many more moves we will make. Games rarely fill the
+        board, so half of our share of the empty cells is assumed.
+        '''
+        return max(self.min_moves_left, empty_cells // 4)
+
+    def budget(self, empty_cells: int) -> float:
+        '''
+        Returns the search time in seconds for the next move.
+        '''
+        spare = self.remaining() - self.reserve
+        budget = spare / self.moves_left(empty_cells) - self.overhead
+        budget = min(budget, self.max_budget)
+
+        if budget < self.floor:
+            # emergency: the reserve is being spent, keep moves minimal
+            budget = min(self.floor, max(self.remaining() / 100, 0))
+        self.last_budget = budget
+        return budget
+
+    def record(self, elapsed: float) -> None:
+        '''
+        Books the measured duration of a move against the clock.
+        '''
+        self.used += elapsed
+        self.moves += 1
+
+        # running average of time spent outside the search
+        if self.last_budget is not None:
+            extra = max(elapsed - self.last_budget, 0)
+            self.overhead += (extra - self.overhead) / self.moves
+            self.last_budget = None
@@ -0,0 +1,47 @@
+from __future__ import annotations
+from collections import OrderedDict
+
+
+class Stats:
+    '''
+    Statistics shared by every node that holds the same position.
+    '''
+    __slots__ = ("N", "Q")
+
+    def __init__(self) -> None:
+        # Visits and accumulated reward for the player who moved in, summed
+        # over every path reaching the position.
+        self.N = 0
+        self.Q = 0
+
+
+class TranspositionTable:
+    '''
+    Bounded map from Zobrist position hashes to shared Stats. When full,
+    the least recently used entry is evicted. Nodes that already hold an
+    evicted entry keep using it; only new nodes stop sharing it.
+    '''
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.entries: OrderedDict[int, Stats] = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key: int) -> Stats:
+        '''
+        Returns the shared statistics for key, creating them if needed.
+        '''
+        stats = self.entries.get(key)
+        if stats is not None:
+            self.entries.move_to_end(key)
+            return stats
+
+        if len(self.entries) >= self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+        stats = Stats()
+        self.entries[key] = stats
+        return stats
+
+    def __len__(self) -> int:
+        return len(self.entries)
@@ -1,37 +1,118 @@
 from __future__ import annotations
 
-from random import choice
-from copy import deepcopy
 import random
 import time
-from typing import List
+from time import perf_counter
+from typing import List, Optional
 import math
 import numpy as np
-from mcts.node import Node
+from mcts.node import Node, UNKNOWN, WIN, LOSS
 from mcts.Board import Board
+from mcts.ArrayBoard import ArrayBoard, RED, CODES
 from mcts.Move import Move
 from mcts.Colour import Colour
+from mcts.playout import fill_playout
+from mcts.inferior import analyse
+from mcts.vc import VCEngine
+from mcts.node_pool import NodePool
+from mcts.profiler import SearchProfile
+from mcts.transposition import TranspositionTable
+from mcts.search_result import SearchResult
+from mcts.batch_playout import batch_playout, red_connects_batch
+
+
+def count_nodes(v: Node) -> int:
+    '''
+    Returns the number of nodes in the subtree below and including v.
+    '''
+    count = 0
+    stack = [v]
+    while stack:
+        v = stack.pop()
+        count += 1
+        stack.extend(v.children)
+    return count
+
 
 class UCT:
-    def __init__(self, board_size: int = 11, colour: Colour = Colour.BLUE, c: int = 1/math.sqrt(2)):
+    def __init__(self, board_size: int = 11, colour: Colour = Colour.BLUE, c: int = 1/math.sqrt(2), board_class: type = ArrayBoard, rollout: str = "fill", batch_size: int = 32, transpositions: int = 0, rave_k: float = 0, prune: bool = False, prefill: bool = False, vc: bool = False, vc_visits: int = 256, vc_lean: float = 0.75, max_nodes: int = 0):
         self.board_size = board_size
+        # Board backend, ArrayBoard copies far faster than the Tile-based Board
+        self.board_class = board_class
+        # Search time in seconds, set per move by the agent's TimeManager
         self.TIME = 9
+        # Iterations between checks for an early stop
+        self.STOP_CHECK = 256
+        # Iterations done whatever the budget, so that the root has a child
+        # to play even when the clock has run out
+        self.MIN_ITERATIONS = 1
         self.colour = colour
         self.c = c
+        # "fill" resolves a whole random game with one connectivity check,
+        # "batch" resolves batch_size of them at once with NumPy,
+        # "step" plays and checks one move at a time.
+        self.rollout = rollout
+        self.batch_size = batch_size
+        # All randomness of the search comes from these two generators, so
+        # seed() makes a search reproducible
+        self.rng = random.Random()
+        self.np_rng = np.random.default_rng()
 
-    def search(self, state: str) -> bytes:
-        t0 = time.time()
+        # Positions reached along different move orders share statistics
+        # through a transposition table holding up to transpositions
+        # entries. 0 disables it.
+        self.tt = TranspositionTable(transpositions) if transpositions > 0 else None
 
-        board = Board.from_string(state, self.board_size)
-        v0 = Node(None, None, board, self.colour)
-        
-        while self.TIME > (time.time() - t0):
-            v1 = self.tree_policy(v0)
-            reward = self.default_policy(v1)
-            self.backup(v1, reward)
+        # All-moves-as-first statistics are blended into best_child with
+        # weight sqrt(rave_k / (3N + rave_k)). 0 disables RAVE.
+        self.rave_k = rave_k
+
+        # Dead and captured cells are left out of the untried pool when
+        # prune is set, and captured cells are given to their owner before
+        # "fill" rollouts when prefill is set
+        self.prune = prune
+        self.prefill = prefill
+
+        # With vc set, a node is checked once for a virtual connection
+        # between either player's edges, and solved without further
+        # simulation if one decides it. One check costs as much as a few
+        # thousand rollouts on 11x11, so it is only done once the node has
+        # vc_visits visits and a mean reward of at least vc_lean for one
+        # side, where a decided position is likely.
+        self.vc = VCEngine() if vc else None
+        self.vc_visits = vc_visits
+        self.vc_lean = vc_lean
+
+        # Final cells and rewards of the last default_policy call
+        self.playout_cells = None
+        self.playout_rewards = None
 
-        # derive action from best child
-        best_child = self.best_child(v0)
+        # With max_nodes set, nodes come from a pool of that size. When it
+        # runs out, the least visited subtrees are collapsed back into
+        # leaves; collapses counts how often that happened.
+        self.pool = NodePool(max_nodes) if max_nodes > 0 else None
+        self.collapses = 0
+
+        # Phase timings of the current search, and iterations pondered
+        # since the last search
+        self.profile = SearchProfile()
+        self.pondered = 0
+
+        # Tree kept between moves, with the position at its root, and the
+        # number of empty cells there
+        self.root: Node = None
+        self.root_board: Board = None
+        self.root_empty = 0
+        # Nodes in the kept tree, counted as they are created, unless the
+        # pool counts them
+        self.nodes = 0
+        # Iterations done by the last build_tree call
+        self.iterations = 0
+
+    def search(self, state: str) -> bytes:
+        v0 = self.build_tree(state)
+
+        best_child = self.final_child(v0)
         
         # convert to string
         move_string = bytes(f"{best_child.a.x},{best_child.a.y}\n", "utf-8")
@@ -39,93 +120,505 @@ class UCT:
         #     print(c.N)
         return move_string
 
-    def default_policy(self, v: Node) -> int:
-        # loop until a terminal node is reached.
-        while not v.s.has_ended():
-            action = choice(v.get_valid_actions(self.board_size, v.colour))
-            new_state = deepcopy(v.s)
-            action.move(new_state)
-        
-            v = Node(v, action, new_state, v.colour.opposite())
+    def seed(self, seed: int) -> None:
+        '''
+        Reseeds both random generators used by the search.
+        '''
+        self.rng.seed(seed)
+        self.np_rng = np.random.default_rng(seed)
+
+    def run(
+        self,
+        state: str,
+        iterations: Optional[int] = None,
+        time_limit: Optional[float] = None,
+        seed: Optional[int] = None,
+        playouts: Optional[int] = None
+    ) -> SearchResult:
+        '''
+        Searches state within a budget of iterations, of playouts, of time
+        in seconds, or whichever runs out first, and returns a
+        SearchResult. One iteration simulates playouts_per_leaf() games,
+        so a playout budget is rounded up to whole iterations. At least
+        one budget must be given, and at least MIN_ITERATIONS iterations
+        are done whatever it is.
+
+        With a seed, the search starts from a fresh tree and transposition
+        table and reseeds its generators, so the same state, seed and
+        iteration or playout budget always give the same result on any
+        machine.
+        '''
+        if iterations is None and playouts is None and time_limit is None:
+            raise ValueError("run needs an iteration, playout or time budget")
+        if playouts is not None:
+            per_leaf = self.playouts_per_leaf()
+            playout_iterations = -(-playouts // per_leaf)
+            if iterations is None or playout_iterations < iterations:
+                iterations = playout_iterations
+
+        if seed is not None:
+            self.seed(seed)
+            self.drop_tree()
+            if self.tt is not None:
+                self.tt = TranspositionTable(self.tt.capacity)
+
+        saved = self.TIME
+        self.TIME = math.inf if time_limit is None else time_limit
+        t0 = time.time()
+        try:
+            v0 = self.build_tree(state, iterations)
+        finally:
+            self.TIME = saved
+        elapsed = time.time() - t0
+
+        best_child = self.final_child(v0)
+        return SearchResult(
+            move=(best_child.a.x, best_child.a.y),
+            stats={(child.a.x, child.a.y): (child.N, child.Q) for child in v0.children},
+            iterations=self.iterations,
+            playouts=self.iterations * self.playouts_per_leaf(),
+            elapsed=elapsed
+        )
+
+    def build_tree(self, state: str, max_iterations: Optional[int] = None) -> Node:
+        '''
+        Runs the search for self.TIME seconds, or at most max_iterations
+        iterations but at least MIN_ITERATIONS, from the protocol board
+        string state and returns the root node. The tree kept from earlier moves is grown further if its
+        root holds the same position.
+        '''
+        t0 = time.time()
+        self.profile.reset()
+        if max_iterations is None:
+            max_iterations = math.inf
+
+        if (self.root is None or self.root.colour != self.colour or
+                self.root_board.print_board() != state):
+            self.drop_tree()
+            self.root_board = self.board_class.from_string(state, self.board_size)
+            self.root = self.new_node(None, None, self.colour)
+            if self.tt is not None:
+                self.root.tt = self.tt.get(self.root_board.get_hash())
+        self.root_empty = len(self.root_board.get_empty_cells())
+
+        # Single scratch board. Every iteration plays its moves on it and
+        # undoes them afterwards, so nodes never need a board of their own.
+        board = self.root_board
+        v0 = self.root
         
-        if v.s.get_winner() == self.colour:
-            return 1
+        self.reopen_root()
+        iterations = 0
+        # a proven root needs no more search
+        while (not v0.proven and (iterations < self.MIN_ITERATIONS or (
+                iterations < max_iterations and
+                self.TIME > (time.time() - t0)))):
+            self.iterate(v0, board)
+
+            iterations += 1
+            # stopping early on a time estimate would make iteration-budget
+            # runs depend on machine speed
+            if (self.TIME != math.inf and iterations % self.STOP_CHECK == 0 and
+                    self.is_decided(v0, iterations, time.time() - t0)):
+                break
+
+        self.iterations = iterations
+        self.profile.finish()
+        return v0
+
+    def final_child(self, v0: Node) -> Node:
+        '''
+        Returns the child of v0 to play: a proven win if there is one,
+        otherwise the most visited child not proven lost, which is what
+        the search spent its time confirming.
+        '''
+        for child in v0.children:
+            if child.proven == WIN:
+                return child
+
+        candidates = [child for child in v0.children if child.proven != LOSS]
+        return max(candidates or v0.children, key=lambda child: child.N)
+
+    def iterate(self, v0: Node, board: Board) -> None:
+        '''
+        Runs one selection, expansion, simulation and backup from v0, whose
+        position is held by board. The board is restored afterwards.
+        '''
+        profile = self.profile
+        t0 = perf_counter()
+        v1 = self.tree_policy(v0, board)
+        if board.has_ended():
+            # in Hex only the player who just moved can have connected
+            v1.proven = WIN
+        t1 = perf_counter()
+        profile.add("selection", t1 - t0)
+
+        depth = 0
+        v = v1
+        while v is not v0:
+            depth += 1
+            v = v.parent
+        if depth > profile.max_depth:
+            profile.max_depth = depth
+
+        n = self.playouts_per_leaf()
+        if v1.proven:
+            # a decided position needs no simulation
+            mover = v1.colour.opposite()
+            won = (v1.proven == WIN) == (mover == self.colour)
+            reward = n if won else -n
+            t2 = t1
         else:
-            return -1
+            reward = self.default_policy(v1, board)
+            t2 = perf_counter()
+            profile.add("rollout", t2 - t1)
+            profile.rollout_cells += self.root_empty - depth
+            profile.playouts += n
+        self.backup(v1, reward, n)
+        if self.rave_k > 0 and not v1.proven:
+            self.backup_amaf(v1)
+        profile.add("backup", perf_counter() - t2)
+        profile.iterations += 1
+        board.undo_all()
+
+    def ponder(self, iterations: int) -> bool:
+        '''
+        Grows the kept tree by a few iterations while the opponent thinks.
+        Returns False if there is nothing to ponder on.
+        '''
+        if self.root is None or self.root.proven:
+            return False
+
+        # the root may be solved partway through the batch
+        done = 0
+        while done < iterations and not self.root.proven:
+            self.iterate(self.root, self.root_board)
+            done += 1
+        self.pondered += done
+        return True
+
+    def is_decided(self, v0: Node, iterations: int, elapsed: float) -> bool:
+        '''
+        Checks if the most visited root child can no longer be overtaken
+        by the runner-up within the remaining time, at the current rate of
+        iterations.
+        '''
+        if len(v0.children) < 2:
+            return len(v0.children) == 1 and not v0.untried
+
+        first, second = 0, 0
+        for child in v0.children:
+            if child.N > first:
+                first, second = child.N, first
+            elif child.N > second:
+                second = child.N
+
+        rate = iterations * self.playouts_per_leaf() / max(elapsed, 1e-9)
+        return first - second > rate * (self.TIME - elapsed)
+
+    def advance(self, x: int, y: int) -> None:
+        '''
+        Follows a move played in the game, by either player. The matching
+        child becomes the new root and the rest of the tree is released.
+        Statistics are stored per mover, not per agent, so the subtree stays
+        valid when colours are swapped.
+        '''
+        if self.root is None:
+            return
+
+        for child in self.root.children:
+            if child.a.x == x and child.a.y == y:
+                Move(self.root.colour, x, y).move(self.root_board)
+                self.root_board.clear_history()
+                self.root_empty -= 1
+                self.root.children.remove(child)
+                if self.pool is not None:
+                    self.pool.release(self.root)
+                else:
+                    # the rest of the tree is freed here anyway, and
+                    # counting it costs about as much as freeing it
+                    self.nodes -= count_nodes(self.root)
+                child.parent = None
+                self.root = child
+                self.reopen_root()
+                return
+
+        # move was never explored, start afresh next search
+        self.drop_tree()
+
+    def reopen_root(self) -> None:
+        '''
+        Clears the proof of a root whose children don't show it: no child
+        proven won, and not all moves expanded and proven lost. Such a root
+        was solved on its own, by virtual connections or before its
+        subtree was collapsed, which says who wins but not with which
+        move, so it has to be searched again.
+        '''
+        v0 = self.root
+        if not v0.proven:
+            return
+        if any(child.proven == WIN for child in v0.children):
+            return
+        if (v0.children and v0.untried is not None and not v0.untried and
+                all(child.proven == LOSS for child in v0.children)):
+            return
+        v0.proven = UNKNOWN
+
+    def tree_size(self) -> int:
+        '''
+        Returns the number of nodes in the kept tree, without walking it.
+        '''
+        if self.pool is not None:
+            return self.pool.in_use()
+        return self.nodes
+
+    def write_profile(self, out, **extra) -> None:
+        '''
+        Writes the profile of the last search to out as one JSON line.
+        '''
+        self.profile.write(
+            out,
+            **extra,
+            colour=self.colour.get_char() if self.colour else None,
+            budget=self.TIME,
+            tree_size=self.tree_size(),
+            pondered=self.pondered,
+            collapses=self.collapses,
+        )
+        self.pondered = 0
+
+    def drop_tree(self) -> None:
+        '''
+        Forgets the kept tree, returning its nodes to the pool.
+        '''
+        if self.pool is not None and self.root is not None:
+            self.pool.release(self.root)
+        self.root = None
+        self.root_board = None
+        self.nodes = 0
+
+    def new_node(self, parent: Node, action: Move, colour: Colour) -> Node:
+        '''
+        Creates a node, from the pool if there is one. Returns None if the
+        pool is used up even after collapsing.
+        '''
+        if self.pool is None:
+            self.nodes += 1
+            return Node(parent, action, colour)
+
+        node = self.pool.allocate(parent, action, colour)
+        if node is None and parent is not None:
+            self.collapse(parent)
+            node = self.pool.allocate(parent, action, colour)
+        return node
+
+    def collapse(self, keep: Node) -> None:
+        '''
+        Frees about a tenth of the pool by collapsing the least visited
+        subtrees back into leaves. A collapsed node keeps its own
+        statistics and is expanded again if the search returns to it.
+        keep and its ancestors are left alone, and so are proven nodes,
+        whose children hold the proof.
+        '''
+        path = set()
+        v = keep
+        while v:
+            path.add(v)
+            v = v.parent
+
+        internal = []
+        stack = [(self.root, 0)]
+        while stack:
+            v, depth = stack.pop()
+            if v.children:
+                if v not in path and not v.proven:
+                    internal.append((v.N, -depth, v))
+                stack.extend((child, depth + 1) for child in v.children)
+
+        # A node has no more visits than its parent, so with ties going to
+        # the deeper node, subtrees are collapsed before their ancestors.
+        internal.sort(key=lambda entry: entry[:2])
+
+        target = len(self.pool.free) + max(self.pool.capacity // 10, 1)
+        for _, _, v in internal:
+            if len(self.pool.free) >= target:
+                break
+            for child in v.children:
+                self.pool.release(child)
+            v.children = []
+            v.untried = None
+        self.collapses += 1
+
+    def playouts_per_leaf(self) -> int:
+        '''
+        Returns how many games one call to default_policy simulates.
+        '''
+        if self.rollout == "batch":
+            return self.batch_size
+        return 1
+
+    def default_policy(self, v: Node, board: Board) -> int:
+        '''
+        Simulates random games from v, whose position is held by board.
+        Returns the summed reward: +1 for every game self.colour wins, -1
+        for every game it loses.
+        '''
+        if self.rollout == "step":
+            return self.step_policy(v, board)
+        if self.rollout == "batch":
+            return self.batch_policy(v, board)
+
+        fixed = None
+        if self.prefill and not board.has_ended():
+            fixed = self.captured_cells(v, board)
+        winner, cells = fill_playout(board, v.colour, self.rng, fixed)
+        reward = 1 if winner == self.colour else -1
+        self.playout_cells = cells
+        self.playout_rewards = reward
+        return reward
+
+    def batch_policy(self, v: Node, board: Board) -> int:
+        '''
+        Plays batch_size random completions of board as one NumPy array and
+        resolves all winners with vectorised connectivity.
+        '''
+        cells = batch_playout(board, v.colour, self.batch_size, self.np_rng)
+        red_won = red_connects_batch(cells == RED)
+
+        rewards = np.where(red_won, 1, -1)
+        if self.colour != Colour.RED:
+            rewards = -rewards
+        self.playout_cells = cells.reshape(self.batch_size, -1)
+        self.playout_rewards = rewards
+        return int(rewards.sum())
+
+    def step_policy(self, v: Node, board: Board) -> int:
+        '''
+        Plays random moves on board, which holds the position of v, until
+        the game ends.
+        '''
+        colour = v.colour
+
+        # loop until a terminal position is reached.
+        while not board.has_ended():
+            action = self.rng.choice(v.get_valid_actions(board, colour))
+            action.move(board)
+            colour = colour.opposite()
+        
+        reward = 1 if board.get_winner() == self.colour else -1
+        # read by backup_amaf before the board is undone
+        self.playout_cells = board.get_cells()
+        self.playout_rewards = reward
+        return reward
    
-    def tree_policy(self, v: Node) -> Node:
+    def tree_policy(self, v: Node, board: Board) -> Node:
         '''
-        Chooses a node for game simulation.
+        Chooses a node for game simulation. The moves leading to it are
+        played on board.
         '''
         
         # Check if v is terminal
-        while not v.s.has_ended():
+        while not board.has_ended():
+
+            # Check if virtual connections already decide v. The root is
+            # left to the search, which has to find the actual move.
+            if (self.vc is not None and not v.vc_checked and
+                    v.N >= self.vc_visits and v.parent is not None and
+                    abs(v.Q) >= self.vc_lean * v.N):
+                v.vc_checked = True
+                winner = self.vc.winner(board, v.colour)
+                if winner is not None:
+                    v.proven = WIN if winner != v.colour else LOSS
+                    return v
             
             # Checks if v is not fully expanded
-            valid_actions = v.get_valid_actions(
-                board_size = self.board_size,
-                colour = v.colour.opposite()
-            )
-            if len(valid_actions) != len(v.children):
-                # print(len(valid_actions))
-                # print('Expand')
-                return self.expand(v)
+            if v.untried is None:
+                v.untried = self.get_untried_actions(v, board)
+            if v.untried:
+                t0 = perf_counter()
+                v = self.expand(v, board)
+                self.profile.add("expansion", perf_counter() - t0)
+                return v
             
             # Choose next node with best_child function
             else:
-                # print('Choose')
                 v = self.best_child(v)
-                # print(v.a.x)
-                # print(v.a.y)
+                v.a.move(board)
         
         # Returns v when it is a terminal node
         return v
     
-    def get_untried_actions(self, v: Node) -> List[Move]:
+    def get_untried_actions(self, v: Node, board: Board) -> List[int]:
         '''
-        Returns all untried actions of a node v.
+        Builds the untried-move pool of a node v whose position is held by
+        board: the flat indices of all empty cells, in random order so that
+        expand can pop from the end. Called once per node. With prune set,
+        dead and captured cells are left out unless nothing else is left,
+        but a captured cell that wins on the spot is kept and tried first.
+        With prefill set, the captured cells are kept on the node for the
+        rollouts below it.
         '''
+        untried = board.get_empty_cells()
+        if self.prune or self.prefill:
+            dead, captured = analyse(board)
+            if self.prefill:
+                v.captured = captured
+        winning = []
+        if self.prune:
+            useful = [
+                idx for idx in untried
+                if idx not in dead and idx not in captured
+            ]
+            # owning a captured pair is as good as owning both cells, but
+            # only a stone actually played there ends the game
+            for idx in captured:
+                x, y = divmod(idx, self.board_size)
+                Move(v.colour, x, y).move(board)
+                if board.has_ended():
+                    winning.append(idx)
+                board.undo()
+            if useful or winning:
+                untried = useful
+        self.rng.shuffle(untried)
+        return untried + winning
 
-        all_valid_actions = v.get_valid_actions(self.board_size, self.colour) # Get all valid actions from v
-        
-        # Check if v has children
-        if len(v.children) != 0:
-            untried_actions: List[Move] = [] # Contains all untried actions
-
-            for action in all_valid_actions:
-                is_tried = False # Label action asuntried
-                
-                for child in v.children:
-                    if action.x == child.a.x and action.y == child.a.y:
-                        is_tried = True # Action was already applied
-                        break
-                
-                if not is_tried: # Add action to untried list
-                    untried_actions.append(action)
-            
-            return untried_actions
-
-        return all_valid_actions
+    def captured_cells(self, v: Node, board: Board) -> dict:
+        '''
+        Returns the captured cells of v's position, held by board, for
+        prefilled rollouts. A leaf not analysed yet borrows its parent's
+        map without the cell just played: stones never leave the board, so
+        cells captured before the move are still captured after it. Only
+        the root can need an analysis of its own here.
+        '''
+        if v.captured is not None:
+            return v.captured
+        parent = v.parent
+        if parent is not None and parent.captured is not None:
+            played = v.a.x * self.board_size + v.a.y
+            return {
+                idx: code for idx, code in parent.captured.items()
+                if idx != played
+            }
+        v.captured = analyse(board)[1]
+        return v.captured
 
-    def expand(self, v: Node) -> Node:
-        # Find untried actions
+    def expand(self, v: Node, board: Board) -> Node:
+        # Add a new child, simulating from v instead if there is no memory
+        # left for one
         next_player = v.colour.opposite()
-        untried_actions = self.get_untried_actions(v)
-        
-        a = untried_actions[random.randint(0, len(untried_actions)-1)]
+        v_prime = self.new_node(v, None, next_player)
+        if v_prime is None:
+            return v
+
+        # Take the next untried action in O(1)
+        x, y = divmod(v.untried.pop(), self.board_size)
+        a = Move(v.colour, x, y)
+        v_prime.a = a
         
-        # Create a copy of state s
-        s_prime = deepcopy(v.s)
-        # Apply the move
-        a.move(s_prime)
-
-        # Add a new child
-        v_prime = Node(
-            parent=v,
-            action=a,
-            state=s_prime,
-            colour=next_player
-        )
+        # Apply the move to the scratch board
+        a.move(board)
+
+        if self.tt is not None:
+            v_prime.tt = self.tt.get(board.get_hash())
         v.children.append(v_prime)
 
         # Return the new child
@@ -133,25 +626,101 @@ class UCT:
 
     def best_child(self, node: Node) -> Node:
         children = node.get_children()
-        ucb_arr = []
+        best_child, best_ucb = None, -math.inf
 
         for child in children:
-            exploit = child.Q / child.N
+            # Proven children need no more search. A node with a proven won
+            # child or only proven lost children is itself proven, so an
+            # unproven node always has an unproven child left.
+            if child.proven:
+                continue
+            # With transpositions, the value is averaged over every path to
+            # the child's position, while exploration still follows the
+            # visits of this edge.
+            if child.tt is not None:
+                exploit = child.tt.Q / child.tt.N
+            else:
+                exploit = child.Q / child.N
+            if self.rave_k > 0 and child.AN > 0:
+                beta = math.sqrt(self.rave_k / (3 * child.N + self.rave_k))
+                exploit = (1 - beta) * exploit + beta * child.AQ / child.AN
             explore = math.sqrt((2 * math.log(node.N)) / child.N)
             ucb = exploit + 2 * self.c * explore
-            ucb_arr.append(ucb)
-
-        argmax = int(np.argmax(ucb_arr))
-        best_child = children[argmax]
+            if ucb > best_ucb:
+                best_child, best_ucb = child, ucb
 
         return best_child
 
     # If parent is the same node, we are at root.
-    def backup(self, node: Node, reward: int):
+    def backup(self, node: Node, reward: int, n: int = 1):
+        '''
+        Propagates the summed reward of n playouts for self.colour up the
+        tree. Each node keeps Q from the point of view of the player who
+        moved into it, so best_child maximises for whoever is choosing.
+        '''
         v = node
         while v:
-            v.N += 1
-            v.Q = v.Q + reward
+            v.N += n
+            if v.colour == self.colour:
+                v.Q = v.Q - reward
+            else:
+                v.Q = v.Q + reward
+            if v.tt is not None:
+                v.tt.N += n
+                v.tt.Q += -reward if v.colour == self.colour else reward
             v = v.parent
 
+        if node.proven:
+            self.backup_proof(node)
+
+    def backup_proof(self, node: Node):
+        '''
+        Propagates a proven result from node towards the root, minimax
+        style. A move that wins for its mover proves the parent lost for
+        whoever moved into it. A parent whose moves have all been expanded
+        and all lose for the player choosing is proven won for its mover.
+        '''
+        v = node
+        while v.parent is not None and not v.parent.proven:
+            parent = v.parent
+            if v.proven == WIN:
+                parent.proven = LOSS
+            elif (parent.untried is not None and not parent.untried and
+                    all(child.proven == LOSS for child in parent.children)):
+                parent.proven = WIN
+            else:
+                break
+            v = parent
+
+    def backup_amaf(self, node: Node):
+        '''
+        Updates the all-moves-as-first statistics along the path to node.
+        A child counts as played if its cell ended the last playout with
+        the colour of the player choosing between the children, wherever
+        in the playout that happened.
+        '''
+        cells = self.playout_cells
+        rewards = self.playout_rewards
+        size = self.board_size
+        batch = isinstance(rewards, np.ndarray)
+
+        v = node
+        while v:
+            code = CODES[v.colour]
+            # children are scored for their mover, the player to move at v
+            sign = 1 if v.colour == self.colour else -1
 
+            if batch and v.children:
+                idx = [child.a.x * size + child.a.y for child in v.children]
+                hits = cells[:, idx] == code
+                counts = hits.sum(axis=0)
+                totals = rewards @ hits
+                for child, n, q in zip(v.children, counts, totals):
+                    child.AN += int(n)
+                    child.AQ += sign * int(q)
+            elif not batch:
+                for child in v.children:
+                    if cells[child.a.x * size + child.a.y] == code:
+                        child.AN += 1
+                        child.AQ += sign * rewards
+            v = v.parent
@@ -0,0 +1,232 @@
+from __future__ import annotations
+import heapq
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+from mcts.ArrayBoard import EMPTY, RED, CODES, neighbour_table
+from mcts.Colour import Colour
+
+# edge-to-edge connection found by H-search for one colour
+NONE = 0
+SEMI = 1   # connected if the colour moves next
+FULL = 2   # connected whoever moves next
+
+
+class HSearch:
+    '''
+    Virtual connections of one colour in one position, by Anshelevich's
+    H-search.
+
+    Points are the empty cells, the colour's stone groups and its two
+    edges. A connection between two points is stored as its carrier, the
+    bit set of empty cells it relies on. Full connections hold against any
+    defence. Semi connections hold if the colour moves first.
+    - AND: full connections x-u and u-z with disjoint carriers give a full
+      x-z connection if u is a stone group, or a semi one through u if u is
+      empty.
+    - OR: semi connections x-z whose carriers have no cell in common give
+      a full x-z connection, as every intrusion leaves one of them intact.
+
+    Bridges and edge templates 2 and 3, as listed in books/templates.py,
+    are the first connections these two rules derive, so no pattern table
+    is needed. The caps bound the work per position and make the search
+    incomplete but never wrong.
+    '''
+    def __init__(
+        self,
+        board,
+        colour: Colour,
+        max_full: int = 3,
+        max_semi: int = 6,
+        max_carrier: int = 12,
+        max_work: int = 200_000
+    ) -> None:
+        self.max_full = max_full
+        self.max_semi = max_semi
+        self.max_carrier = max_carrier
+        self.max_work = max_work
+
+        size = board.get_size()
+        area = size * size
+        cells = board.get_cells()
+        code = CODES[colour]
+        neighbours = neighbour_table(size)
+
+        # two virtual points for the colour's edges
+        self.edges = (area, area + 1)
+
+        # point of every cell: the cell itself when empty, the lowest cell
+        # of its group for the colour's stones, -1 for opponent stones
+        point = [-1] * area
+        for idx in range(area):
+            if cells[idx] == EMPTY:
+                point[idx] = idx
+            elif cells[idx] == code and point[idx] < 0:
+                stack = [idx]
+                point[idx] = idx
+                while stack:
+                    cell = stack.pop()
+                    for n_idx in neighbours[cell]:
+                        if cells[n_idx] == code and point[n_idx] < 0:
+                            point[n_idx] = idx
+                            stack.append(n_idx)
+        self.point = point
+        self.empty = [cells[idx] == EMPTY for idx in range(area)]
+
+        self.full: Dict[Tuple[int, int], List[int]] = {}
+        self.semi: Dict[Tuple[int, int], List[int]] = {}
+        # full connections by endpoint, as (other point, carrier)
+        self.full_at: Dict[int, List[Tuple[int, int]]] = {}
+        # new full connections as (carrier size, order, p, q, carrier), so
+        # the smallest carriers are combined first
+        self.queue: List[Tuple[int, int, int, int, int]] = []
+        self.added = 0
+
+        # adjacent points are fully connected with an empty carrier
+        for idx in range(area):
+            p = point[idx]
+            if p < 0:
+                continue
+            for n_idx in neighbours[idx]:
+                q = point[n_idx]
+                if q >= 0 and q != p:
+                    self.add_full(p, q, 0)
+
+            x, y = divmod(idx, size)
+            line = x if code == RED else y
+            if line == 0:
+                self.add_full(p, self.edges[0], 0)
+            if line == size - 1:
+                self.add_full(p, self.edges[1], 0)
+
+        self.run()
+
+    def bit(self, p: int) -> int:
+        '''
+        Returns the carrier bit of point p, 0 for groups and edges.
+        '''
+        if p < len(self.empty) and self.empty[p]:
+            return 1 << p
+        return 0
+
+    def add_full(self, p: int, q: int, carrier: int) -> None:
+        key = (p, q) if p < q else (q, p)
+        carriers = self.full.setdefault(key, [])
+        for known in carriers:
+            if known & carrier == known:
+                return
+        # a smaller carrier makes any superset of it redundant
+        carriers[:] = [known for known in carriers if known & carrier != carrier]
+        if len(carriers) >= self.max_full:
+            return
+        carriers.append(carrier)
+        self.full_at.setdefault(p, []).append((q, carrier))
+        self.full_at.setdefault(q, []).append((p, carrier))
+        self.added += 1
+        heapq.heappush(
+            self.queue, (bin(carrier).count("1"), self.added, p, q, carrier)
+        )
+
+    def add_semi(self, p: int, q: int, carrier: int) -> None:
+        if bin(carrier).count("1") > self.max_carrier:
+            return
+        key = (p, q) if p < q else (q, p)
+        for known in self.full.get(key, ()):
+            if known & carrier == known:
+                return
+
+        carriers = self.semi.setdefault(key, [])
+        for known in carriers:
+            if known & carrier == known:
+                return
+        carriers[:] = [known for known in carriers if known & carrier != carrier]
+        if len(carriers) >= self.max_semi:
+            return
+
+        # OR rule, first with each single semi connection, then with all
+        # of them together
+        union, common = carrier, carrier
+        for known in carriers:
+            if known & carrier == 0:
+                self.add_full(p, q, known | carrier)
+            union |= known
+            common &= known
+        if carriers and common == 0:
+            self.add_full(p, q, union)
+
+        carriers.append(carrier)
+
+    def run(self) -> None:
+        '''
+        Applies the AND rule to every new full connection until nothing new
+        is found or the work cap is reached.
+        '''
+        work = 0
+        while self.queue and work < self.max_work:
+            _, _, x, y, carrier = heapq.heappop(self.queue)
+            # join x-y with every full connection at either end
+            for mid, end in ((y, x), (x, y)):
+                mid_bit = self.bit(mid)
+                end_bit = self.bit(end)
+                for other, other_carrier in list(self.full_at.get(mid, ())):
+                    work += 1
+                    if other == end:
+                        continue
+                    if (carrier & other_carrier or
+                            other_carrier & end_bit or
+                            carrier & self.bit(other)):
+                        continue
+                    if mid_bit:
+                        self.add_semi(end, other, carrier | other_carrier | mid_bit)
+                    elif bin(carrier | other_carrier).count("1") <= self.max_carrier:
+                        self.add_full(end, other, carrier | other_carrier)
+
+    def connection(self) -> int:
+        '''
+        Returns FULL, SEMI or NONE for the connection between the edges.
+        '''
+        if self.full.get(self.edges):
+            return FULL
+        if self.semi.get(self.edges):
+            return SEMI
+        return NONE
+
+
+class VCEngine:
+    '''
+    Edge-to-edge virtual connection status of positions, cached by Zobrist
+    hash so a position reached again, along any move order, is not searched
+    twice. The cache holds up to capacity positions, least recently used
+    first out.
+    '''
+    def __init__(self, capacity: int = 50_000, **hsearch_kwargs) -> None:
+        self.capacity = capacity
+        self.hsearch_kwargs = hsearch_kwargs
+        self.cache: OrderedDict[Tuple[int, Colour], int] = OrderedDict()
+
+    def connection(self, board, colour: Colour) -> int:
+        '''
+        Returns FULL, SEMI or NONE for colour's edges on board.
+        '''
+        key = (board.get_hash(), colour)
+        status = self.cache.get(key)
+        if status is not None:
+            self.cache.move_to_end(key)
+            return status
+
+        status = HSearch(board, colour, **self.hsearch_kwargs).connection()
+        if len(self.cache) >= self.capacity:
+            self.cache.popitem(last=False)
+        self.cache[key] = status
+        return status
+
+    def winner(self, board, to_move: Colour) -> Colour:
+        '''
+        Returns the player who wins with correct play from board, with
+        to_move to play, if the virtual connections decide it, else None.
+        '''
+        other = to_move.opposite()
+        if self.connection(board, other) == FULL:
+            return other
+        if self.connection(board, to_move) != NONE:
+            return to_move
+        return None
@@ -1,4 +1,5 @@
 import socket
+from os import environ
 from random import choice
 from time import sleep
 
@@ -9,7 +10,7 @@ class NaiveAgent():
     """
 
     HOST = "127.0.0.1"
-    PORT = 1234
+    PORT = int(environ.get("HEX_PORT", 1234))
 
     def __init__(self, board_size=11):
         self.s = socket.socket(
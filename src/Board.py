@@ -1,5 +1,6 @@
 from Tile import Tile
 from Colour import Colour
+from UnionFind import UnionFind
 
 
 class Board:
@@ -19,6 +20,20 @@ class Board:
 
         self._winner = None
 
+        # Connectivity is tracked incrementally as tiles are coloured: one
+        # union-find node per tile plus four virtual edge nodes
+        area = board_size * board_size
+        self._top, self._bottom = area, area + 1
+        self._left, self._right = area + 2, area + 3
+        self._uf = UnionFind(area + 4)
+
+        # Protocol string of the board, patched at the changed tile on every
+        # move instead of being rebuilt: one row of tile characters
+        # followed by a comma per line, without the final comma
+        self._protocol = bytearray(
+            b",".join([b"0" * board_size] * board_size)
+        )
+
     def from_string(string_input, board_size=11, bnf=True):
         """Loads a board from a string representation. If bnf=True, it will
         load a protocol-formatted string. Otherwise, it will load from a
@@ -42,70 +57,57 @@ class Board:
         return b
 
     def has_ended(self):
-        """Checks if the game has ended. It will attempt to find a red chain
-        from top to bottom or a blue chain from left to right of the board.
+        """Checks if the game has ended. The winner is kept up to date by
+        set_tile_colour, so this is a constant-time query.
         """
 
-        # Red
-        # for all top tiles, check if they connect to bottom
-        for idx in range(self._board_size):
-            tile = self._tiles[0][idx]
-            if (not tile.is_visited() and
-                tile.get_colour() == Colour.RED and
-                    self._winner is None):
-                self.DFS_colour(0, idx, Colour.RED)
-        # Blue
-        # for all left tiles, check if they connect to right
-        for idx in range(self._board_size):
-            tile = self._tiles[idx][0]
-            if (not tile.is_visited() and
-                tile.get_colour() == Colour.BLUE and
-                    self._winner is None):
-                self.DFS_colour(idx, 0, Colour.BLUE)
-
-        # un-visit tiles
-        self.clear_tiles()
-
         return self._winner is not None
 
-    def clear_tiles(self):
-        """Clears the visited status from all tiles."""
-
-        for line in self._tiles:
-            for tile in line:
-                tile.clear_visit()
-
-    def DFS_colour(self, x, y, colour):
-        """A recursive DFS method that iterates through connected same-colour
-        tiles until it finds a bottom tile (Red) or a right tile (Blue).
+    def _connect(self, x, y, colour):
+        """Merges a newly coloured tile with its same-colour neighbours and
+        the virtual edge nodes it touches, then checks for a winning chain.
         """
 
-        self._tiles[x][y].visit()
+        uf = self._uf
+        idx = x * self._board_size + y
+        last = self._board_size - 1
+
+        for n_idx in range(Tile.NEIGHBOUR_COUNT):
+            x_n = x + Tile.I_DISPLACEMENTS[n_idx]
+            y_n = y + Tile.J_DISPLACEMENTS[n_idx]
+            if (x_n >= 0 and x_n < self._board_size and
+                    y_n >= 0 and y_n < self._board_size and
+                    self._tiles[x_n][y_n].get_colour() == colour):
+                uf.union(idx, x_n * self._board_size + y_n)
 
-        # win conditions
+        # Red connects top to bottom, Blue connects left to right
         if (colour == Colour.RED):
-            if (x == self._board_size-1):
+            if (x == 0):
+                uf.union(idx, self._top)
+            if (x == last):
+                uf.union(idx, self._bottom)
+            if (uf.connected(self._top, self._bottom)):
                 self._winner = colour
         elif (colour == Colour.BLUE):
-            if (y == self._board_size-1):
+            if (y == 0):
+                uf.union(idx, self._left)
+            if (y == last):
+                uf.union(idx, self._right)
+            if (uf.connected(self._left, self._right)):
                 self._winner = colour
-        else:
-            return
 
-        # end condition
-        if (self._winner is not None):
-            return
+    def _rebuild(self):
+        """Recomputes all groups from scratch. Only needed when a stone is
+        removed or recoloured, which never happens during normal play.
+        """
 
-        # visit neighbours
-        for idx in range(Tile.NEIGHBOUR_COUNT):
-            x_n = x + Tile.I_DISPLACEMENTS[idx]
-            y_n = y + Tile.J_DISPLACEMENTS[idx]
-            if (x_n >= 0 and x_n < self._board_size and
-                    y_n >= 0 and y_n < self._board_size):
-                neighbour = self._tiles[x_n][y_n]
-                if (not neighbour.is_visited() and
-                        neighbour.get_colour() == colour):
-                    self.DFS_colour(x_n, y_n, colour)
+        self._uf = UnionFind(self._board_size * self._board_size + 4)
+        self._winner = None
+        for line in self._tiles:
+            for tile in line:
+                if (tile.get_colour() is not None):
+                    self._connect(tile.get_x(), tile.get_y(),
+                                  tile.get_colour())
 
     def print_board(self, bnf=True):
         """Returns the string representation of a board. If bnf=True, the
@@ -114,11 +116,7 @@ class Board:
 
         output = ""
         if (bnf):
-            for line in self._tiles:
-                for tile in line:
-                    output += Colour.get_char(tile.get_colour())
-                output += ","
-            output = output[:-1]
+            output = self._protocol.decode()
         else:
             leading_spaces = ""
             for line in self._tiles:
@@ -140,7 +138,17 @@ class Board:
         return self._tiles
 
     def set_tile_colour(self, x, y, colour):
-        self._tiles[x][y].set_colour(colour)
+        tile = self._tiles[x][y]
+        previous = tile.get_colour()
+        tile.set_colour(colour)
+        self._protocol[x * (self._board_size + 1) + y] = ord(
+            Colour.get_char(colour))
+
+        if (previous is None):
+            if (colour is not None):
+                self._connect(x, y, colour)
+        elif (previous != colour):
+            self._rebuild()
 
 
 if (__name__ == "__main__"):
@@ -1,7 +1,7 @@
-from sys import stderr
+import sys
+from zlib import crc32
 from time import time_ns as time
 from os.path import realpath, sep
-from os.path import exists
 from datetime import datetime
 from pathlib import Path
 
@@ -10,6 +10,7 @@ from Board import Board
 from Move import Move
 from Protocol import Protocol
 from EndState import EndState
+from LogWriter import LogWriter
 
 
 class Game():
@@ -21,6 +22,9 @@ class Game():
     # 1 second in nanoseconds
     # MAXIMUM_TIME = 10**9
 
+    # delta CHANGE messages carry a board checksum every this many turns
+    DELTA_CHECK_PERIOD = 10
+
     def __init__(
         self,
         board_size=11,
@@ -36,7 +40,10 @@ class Game():
         log=True,
         print_protocol=False,
         kill_bots=True,
-        silent_bots=True
+        silent_bots=True,
+        delta=False,
+        binary_log=False,
+        port=Protocol.PORT
     ):
         self._turn = 1  # current turn count
         self._board = Board(board_size)
@@ -65,19 +72,36 @@ class Game():
 
         self._kill_bots = kill_bots
         self._silent_bots = silent_bots
+        # 0 lets the OS choose a free port
+        self._port = port
+        # summary of the finished game, see get_result
+        self._result = None
+        # set once the game has been wrapped up, which happens only once
+        self._ended = False
 
         self._verbose = verbose
         self._print_protocol = print_protocol
+        # offer agents CHANGE messages without the full board
+        self._delta = delta
         self._log = log
+        # also log the moves as fixed-size binary records
+        self._binary_log = binary_log
         self._start_log()
 
     def run(self):
         """Runs the match."""
         try:
             self._play()
-        except BaseException as e:
+        except Exception as e:
             self._end_game(None)
             print(f"Exception raised: {e}")
+        finally:
+            # whatever happened, the buffered log reaches the disk. A match
+            # stopped by a signal or an interrupt gets no END record, but
+            # its agents are still stopped
+            if (not self._ended):
+                Protocol.close(kill_children=True)
+            self._close_log()
 
     def _play(self):
         """Main method for a match.
@@ -113,6 +137,8 @@ class Game():
             start=True
         )
 
+        # Red's first wait starts now, so the time it spends answering the
+        # delta offer is billed to its first move
         self._start_time = time()
         end_state = EndState.WIN
 
@@ -123,10 +149,11 @@ class Game():
             # This message is sent after reading a move because it
             # is a time-consuming operation. Changing the order
             # will decrease the accuracy with which move time is
-            # recorded.
-            self._send_message(
-                verbose_message=self._board.print_board(bnf=False)
-            )
+            # recorded. The board is only rendered if it is shown.
+            if (self._verbose):
+                self._send_message(
+                    verbose_message=self._board.print_board(bnf=False)
+                )
 
             # timeout
             if (move_time == -1):
@@ -168,12 +195,25 @@ class Game():
 
         next_player = self.get_next_player()
 
-        verbose_message = (
-            f"{self._players[self._player]['name']} {verbose_message}"
-        )
+        # Delta protocol agents get the move without the board, and a
+        # checksum of the board now and then to confirm they kept up
+        delta_message = ""
+        if (self._delta):
+            checksum = "#"
+            if (self._turn % Game.DELTA_CHECK_PERIOD == 0 or
+                    next_player == "END"):
+                checksum += f"{crc32(self._board.print_board().encode()):08x}"
+            delta_message = f"{protocol_message}{checksum};{next_player}\n"
+
+        if (self._verbose):
+            verbose_message = (
+                f"{self._players[self._player]['name']} {verbose_message}"
+            )
+        else:
+            verbose_message = ""
         protocol_message += f"{self._board.print_board()};{next_player}\n"
 
-        self._send_message(verbose_message, protocol_message)
+        self._send_message(verbose_message, protocol_message, delta_message)
 
     def get_next_player(self):
         """Returns END if the game is over or the opposite player
@@ -189,10 +229,13 @@ class Game():
         self,
         verbose_message="",
         protocol_message="",
+        delta_message="",
         start=False
     ):
         """Sends messages to the shell or the agents through
         standardised channels. This does not include CSV logging.
+        Agents that accepted the delta protocol get delta_message instead
+        of protocol_message, if one is given.
         """
 
         if (self._verbose and verbose_message != ""):
@@ -200,20 +243,34 @@ class Game():
 
         if (protocol_message != ""):
             if (start):
+                # the delta protocol is offered as an extra START field,
+                # which agents that don't know it ignore. Their answer is
+                # read with their first message, so nobody waits for it
+                offer = ""
+                if (self._delta):
+                    offer = ";DELTA"
+                    for colour in Colour:
+                        Protocol.offer_delta(colour)
                 Protocol.send_message(
-                    Colour.RED, f"{protocol_message}R\n",
+                    Colour.RED, f"{protocol_message}R{offer}\n",
                     verbose=self._print_protocol
                 )
                 Protocol.send_message(
-                    Colour.BLUE, f"{protocol_message}B\n"
+                    Colour.BLUE, f"{protocol_message}B{offer}\n"
                 )
             else:
+                messages = {}
+                for colour in Colour:
+                    messages[colour] = protocol_message
+                    if (delta_message != "" and Protocol.poll_delta(
+                            colour, self._print_protocol)):
+                        messages[colour] = delta_message
                 Protocol.send_message(
-                    Colour.RED, protocol_message,
+                    Colour.RED, messages[Colour.RED],
                     verbose=self._print_protocol
                 )
                 Protocol.send_message(
-                    Colour.BLUE, protocol_message
+                    Colour.BLUE, messages[Colour.BLUE]
                 )
 
     def _get_move(self):
@@ -269,6 +326,11 @@ class Game():
             move = Move(self._player, -2, -2)
 
         self._write_log(log_message)
+        if (self._log):
+            self._log_writer.write_move(
+                self._turn, self._player,
+                move.get_x(), move.get_y(), move_time
+            )
         return (move, move_time)
 
     def _swap(self):
@@ -296,13 +358,18 @@ class Game():
 
     def _end_game(self, status):
         """Wraps up the game and prints results to shell, log and
-        agents.
+        agents. Only the first call does anything.
         """
 
+        if (self._ended):
+            return
+        self._ended = True
+
         # print the board again
-        self._send_message(
-            verbose_message=self._board.print_board(bnf=False)
-        )
+        if (self._verbose):
+            self._send_message(
+                verbose_message=self._board.print_board(bnf=False)
+            )
 
         # calculate total time elapsed
         total_time = time() - self._start_time
@@ -327,6 +394,7 @@ class Game():
         verbose_message = ""
         protocol_message = "END"
         log_message = ""
+        winner = None
 
         if (status == EndState.WIN):
             # last move overcounts
@@ -336,6 +404,7 @@ class Game():
                 f"Game over. {self._players[self._player]['name']} " +
                 "has won!\n"
             )
+            winner = self._player
             protocol_message = f"END;{self._player.get_char()}\n"
             log_message = (
                 f"0,{self._players[self._player]['name']}," +
@@ -350,6 +419,7 @@ class Game():
                 "has sent an illegal message. " +
                 f"{self._players[self._player]['name']} has won!\n"
             )
+            winner = self._player
             protocol_message = f"END;{self._player.get_char()}\n"
             log_message = (
                 f"0,{self._players[self._player]['name']}," +
@@ -367,6 +437,7 @@ class Game():
                 "has timed out. " +
                 f"{self._players[self._player]['name']} has won!\n"
             )
+            winner = self._player
             protocol_message = f"END;{self._player.get_char()}\n"
             log_message = (
                 f"0,{self._players[self._player]['name']}," +
@@ -404,11 +475,36 @@ class Game():
                 f"{self._players[colour]['time']},{means[colour]}\n"
             )
 
+        self._result = {
+            'status': EndState.get_text(status),
+            'winner': None,
+            'loser': None,
+            'swapped': self._has_swapped,
+            'turns': self._turn,
+            'time': total_time,
+            'players': {}
+        }
+        if (winner is not None):
+            self._result['winner'] = self._players[winner]['name']
+            self._result['loser'] = self._players[winner.opposite()]['name']
+        for colour in Colour:
+            self._result['players'][self._players[colour]['name']] = {
+                'colour': colour.get_char(),
+                'turns': self._players[colour]['turns'],
+                'time': self._players[colour]['time']
+            }
+
         self._send_message(verbose_message, protocol_message)
         self._write_log(log_message)
 
         if (self._log):
+            self._log_writer.write_end(
+                winner, status, self._has_swapped, total_time
+            )
+            self._log_writer.flush()
             print(f"Saved log to {self._log_path}")
+            if (self._binary_log):
+                print(f"Saved binary log to {self._log_writer.binary_path}")
 
         # short-form results; easier to read than verbose option
         red_end_s = (str(self._player == Colour.RED) + " " +
@@ -422,7 +518,7 @@ class Game():
         final_message = (
             f"{EndState.get_text(status)}\n{red_end_s}\n{blue_end_s}"
         )
-        print(final_message, file=stderr)
+        print(final_message, file=sys.stderr)
 
         # close communications
         Protocol.close(
@@ -435,7 +531,7 @@ class Game():
         connects to them. If either connection fails, the game
         will not start.
         """
-        Protocol.start()
+        Protocol.start(self._port)
 
         self._has_connected = Protocol.accept_connection(
             s1, name1, Game.MAXIMUM_TIME,
@@ -454,41 +550,55 @@ class Game():
             self._player = self._player.opposite()
 
     def _start_log(self):
-        """Creates the log file and writes the start message."""
+        """Opens the log files and writes the start message."""
         if (not self._log):
             return
 
         # get the relative path to the log directory
         log_path = realpath(__file__)
         log_path = sep.join(log_path.split(sep)[:-2])
-        log_path += f"{sep}logs{sep}"
+        log_path += f"{sep}logs"
 
         # create the log directory if it doesn't exist
         Path(log_path).mkdir(parents=True, exist_ok=True)
 
-        # create a new log file
-        self._log_path = log_path + "log.csv"
-        idx = 1
-        while exists(self._log_path):
-            self._log_path = log_path + f"log{idx}.csv"
-            idx += 1
+        # create new log files, kept open until the game ends
+        self._log_writer = LogWriter(
+            log_path, self._board.get_size(), self._binary_log
+        )
+        self._log_path = self._log_writer.path
 
         # submit the start message
-        with open(self._log_path, "w") as f:
-            f.write(f"Start log at {datetime.now()}\n")
-            f.write(
-                f"Board is {self._board.get_size()}x" +
-                f"{self._board.get_size()}.\n"
-            )
-            f.write("No,Player,X,Y,Time\n")
+        self._log_writer.write(
+            f"Start log at {datetime.now()}\n" +
+            f"Board is {self._board.get_size()}x" +
+            f"{self._board.get_size()}.\n" +
+            "No,Player,X,Y,Time\n"
+        )
 
     def _write_log(self, message):
         """Writes the specified message and a newline to the log file."""
         if (not self._log):
             return
 
-        with open(self._log_path, "a") as f:
-            f.write(message + "\n")
+        self._log_writer.write(message + "\n")
+
+    def _close_log(self):
+        """Flushes and closes the log files."""
+        if (not self._log):
+            return
+
+        self._log_writer.close()
+
+    def get_result(self):
+        """Returns a summary of the finished game as a dictionary, or None
+        if it has not ended. 'winner' and 'loser' are player names, None
+        if the game ended abnormally. 'players' maps each name to the
+        colour they ended the game as, their turns and their time in
+        nanoseconds.
+        """
+
+        return self._result
 
     def get_board(self):
         return self._board
@@ -0,0 +1,168 @@
+from datetime import datetime
+from itertools import count
+from os import getpid
+from os.path import sep
+from struct import Struct
+import sys
+
+from Colour import Colour
+from EndState import EndState
+
+
+class LogWriter():
+    """This class writes the log files of a match.
+
+    The CSV log is kept open with a large buffer for the whole match and
+    only reaches the disk when the buffer fills or the writer is flushed
+    or closed. File names are made of the start time, the process id and
+    a per-process counter, so they are unique without searching the log
+    directory for a free name.
+
+    With binary=True, every move is also written as a fixed-size record
+    to a .bin file next to the CSV. The file starts with HEADER, holding
+    MAGIC, the format version and the board size, followed by RECORD
+    entries of turn, colour code, x, y and time in nanoseconds. Swaps are
+    stored as x = y = -1 and illegal messages as x = y = -2. Values too
+    large for their field are clamped. The last record has turn 0, the
+    winner's colour code, the END_CODES value of the end state as x, 1 as
+    y if the players swapped, and the total match time.
+
+    A log that can't be written is reported once on stderr and given up,
+    as losing the log must not end the match.
+    """
+
+    BUFFER_SIZE = 64 * 1024
+
+    MAGIC = b"HEXL"
+    VERSION = 2
+    HEADER = Struct("<4sBH")
+    RECORD = Struct("<IBhhq")
+
+    COLOUR_CODES = {None: 0, Colour.RED: 1, Colour.BLUE: 2}
+    END_CODES = {
+        None: 0,
+        EndState.WIN: 1,
+        EndState.TIMEOUT: 2,
+        EndState.BAD_MOVE: 3
+    }
+
+    # makes names unique between games started by one process
+    _counter = count()
+
+    def __init__(self, directory, board_size, binary=False):
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+
+        # the exclusive create only fails if another process with the
+        # same id already logged at this time, which needs a restart
+        while True:
+            name = f"log-{stamp}-{getpid()}-{next(LogWriter._counter)}"
+            try:
+                self._csv = open(
+                    f"{directory}{sep}{name}.csv", "x",
+                    buffering=LogWriter.BUFFER_SIZE
+                )
+                break
+            except FileExistsError:
+                continue
+
+        self.path = self._csv.name
+        # set once a write failed, after which nothing more is written
+        self.failed = False
+        self._bin = None
+        self.binary_path = None
+        if (binary):
+            self._bin = open(
+                f"{directory}{sep}{name}.bin", "xb",
+                buffering=LogWriter.BUFFER_SIZE
+            )
+            self.binary_path = self._bin.name
+            self._bin.write(LogWriter.HEADER.pack(
+                LogWriter.MAGIC, LogWriter.VERSION, board_size
+            ))
+
+    def write(self, text):
+        """Adds the given text to the CSV log."""
+
+        self._guard(self._csv.write, text)
+
+    def write_move(self, turn, colour, x, y, move_time):
+        """Adds a move record to the binary log, if there is one."""
+
+        if (self._bin is None):
+            return
+
+        # coordinates too large for a record can only be illegal
+        if (not -2 <= x < 2**15 or not -2 <= y < 2**15):
+            x, y = -2, -2
+
+        self._guard(self._bin.write, LogWriter.RECORD.pack(
+            min(turn, 2**32 - 1), LogWriter.COLOUR_CODES[colour], x, y,
+            min(move_time, 2**63 - 1)
+        ))
+
+    def write_end(self, winner, status, swapped, total_time):
+        """Adds the end record to the binary log, if there is one."""
+
+        if (self._bin is None):
+            return
+
+        self._guard(self._bin.write, LogWriter.RECORD.pack(
+            0, LogWriter.COLOUR_CODES[winner],
+            LogWriter.END_CODES[status], int(swapped),
+            min(total_time, 2**63 - 1)
+        ))
+
+    def flush(self):
+        """Writes everything buffered so far to the disk."""
+
+        self._guard(self._csv.flush)
+        if (self._bin is not None):
+            self._guard(self._bin.flush)
+
+    def close(self):
+        """Flushes and closes the log files. Closing twice is harmless."""
+
+        for f in (self._csv, self._bin):
+            if (f is None):
+                continue
+            try:
+                f.close()
+            except OSError as e:
+                self._fail(e)
+
+    def _guard(self, operation, *args):
+        """Runs a write or flush on a log file, unless writing has already
+        failed.
+        """
+
+        if (self.failed):
+            return
+        try:
+            operation(*args)
+        except OSError as e:
+            self._fail(e)
+
+    def _fail(self, error):
+        if (not self.failed):
+            print(f"Log {self.path} could not be written: {error}",
+                  file=sys.stderr)
+        self.failed = True
+
+    @staticmethod
+    def read_records(path):
+        """Reads a binary log. Returns the board size and the list of
+        records as (turn, colour code, x, y, time) tuples.
+        """
+
+        with open(path, "rb") as f:
+            data = f.read()
+
+        magic, version, board_size = LogWriter.HEADER.unpack_from(data)
+        if (magic != LogWriter.MAGIC or version != LogWriter.VERSION):
+            raise ValueError(f"{path} is not a version {LogWriter.VERSION} "
+                             "binary log.")
+
+        records = list(LogWriter.RECORD.iter_unpack(
+            data[LogWriter.HEADER.size:]
+        ))
+        return (board_size, records)
@@ -35,9 +35,8 @@ class Move():
         return self.x == -1 and self.y == -1
 
     def move(self, b):
-        # fill the tile
-        tile = b.get_tiles()[self.x][self.y]
-        tile.set_colour(self.colour)
+        # fill the tile through the board, so it can update connectivity
+        b.set_tile_colour(self.x, self.y, self.colour)
 
     def get_x(self):
         return self.x
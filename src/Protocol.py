@@ -1,5 +1,7 @@
 import socket
 import subprocess
+from os import environ
+from select import select
 from sys import platform, stdout
 from time import time_ns
 from Colour import Colour
@@ -14,19 +16,24 @@ class Protocol():
     HOST = "127.0.0.1"
     PORT = 1234
     s = None
+    # port the server is listening on
+    port = PORT
     sockets = {Colour.RED: {}, Colour.BLUE: {}}
 
     @staticmethod
-    def start():
-        """Sets up a TCP server. The socket reuse address option is
+    def start(port=PORT):
+        """Sets up a TCP server on the given port, or on a free port
+        chosen by the OS if it is 0. The socket reuse address option is
         enabled because Linux does not close sockets immediately on
         application exit. This would cause issues with successive
         matches.
         """
 
+        Protocol.sockets = {Colour.RED: {}, Colour.BLUE: {}}
         Protocol.s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         Protocol.s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        Protocol.s.bind((Protocol.HOST, Protocol.PORT))
+        Protocol.s.bind((Protocol.HOST, port))
+        Protocol.port = Protocol.s.getsockname()[1]
         Protocol.s.listen()
 
     @staticmethod
@@ -38,8 +45,9 @@ class Protocol():
         verbose=False
     ):
         """Starts a subprocess with the specified string then waits for the
-        new process to connect to the socket. Returns True if the connection
-        was made, False otherwise.
+        new process to connect to the socket. The port to connect to is
+        passed to the agent in the HEX_PORT environment variable. Returns
+        True if the connection was made, False otherwise.
         """
 
         # separate run_s into a list of arguments to be used in a linux shell
@@ -61,7 +69,10 @@ class Protocol():
             output = subprocess.DEVNULL
 
         # start the agent
-        t = subprocess.Popen(run_s, stdout=output, stderr=output, shell=False)
+        env = dict(environ, HEX_PORT=str(Protocol.port))
+        t = subprocess.Popen(
+            run_s, stdout=output, stderr=output, shell=False, env=env
+        )
 
         # wait for a connection
         try:
@@ -80,6 +91,11 @@ class Protocol():
         Protocol.sockets[colour]['thread'] = t
         Protocol.sockets[colour]['conn'] = conn
         Protocol.sockets[colour]['addr'] = addr
+        # delta mode is off until the agent accepts it, None while the
+        # offer is open
+        Protocol.sockets[colour]['delta'] = False
+        # (text, wait time) read early and not consumed yet
+        Protocol.sockets[colour]['pending'] = None
 
         return conn is not None
 
@@ -87,6 +103,44 @@ class Protocol():
     def get_message(colour, timeout_ns=30*10**9, verbose=False):
         """Waits for a message from the given colour agent for the specified
         length of time. Returns the text and the associated wait time.
+        An answer to an open delta offer is taken off the front of the
+        message, and if nothing else came with it the wait goes on for the
+        rest of the message, billed as one wait.
+        """
+
+        pending = Protocol.sockets[colour].get('pending')
+        if (pending is not None):
+            Protocol.sockets[colour]['pending'] = None
+            text, move_time = pending
+        else:
+            text, move_time = Protocol._receive(colour, timeout_ns, verbose)
+            if (move_time != -1 and
+                    Protocol.sockets[colour].get('delta') is None):
+                text = Protocol._answer_delta(colour, text, verbose)
+                if (text.strip() == ""):
+                    rest, rest_time = Protocol._receive(
+                        colour, max(timeout_ns - move_time, 0), verbose
+                    )
+                    if (rest_time == -1):
+                        return (rest, -1)
+                    text, move_time = rest, move_time + rest_time
+            if (move_time == -1):
+                return (text, move_time)
+
+        if verbose:
+            print(
+                f"Received {text.strip()} from " +
+                f"{Protocol.sockets[colour]['name']} in " +
+                f"~{int(move_time/10**4)/10**5}s."
+            )
+
+        return (text, move_time)
+
+    @staticmethod
+    def _receive(colour, timeout_ns, verbose=False):
+        """Reads whatever the given colour agent sends within the specified
+        length of time. Returns the text and the wait time, or NO MESSAGE
+        and -1 if nothing came.
         """
 
         try:
@@ -118,14 +172,65 @@ class Protocol():
                 )
             return ("NO MESSAGE", -1)
 
+        return (data.decode("utf-8"), move_time)
+
+    @staticmethod
+    def offer_delta(colour):
+        """Marks the delta protocol as offered to the given colour agent in
+        its START message. The offer stays open until the agent's first
+        message, which starts with a DELTA line if it accepts. Until then
+        the agent gets the full protocol.
+        """
+
+        Protocol.sockets[colour]['delta'] = None
+
+    @staticmethod
+    def _answer_delta(colour, text, verbose=False):
+        """Settles the open delta offer of the given colour agent with the
+        first message it sent. Returns the message without the answer.
+        """
+
+        first, _, rest = text.partition("\n")
+        accepted = first.strip() == "DELTA"
+        if (not accepted):
+            # agents that do not know the offer answer with their move
+            rest = text
+
+        Protocol.sockets[colour]['delta'] = accepted
         if verbose:
             print(
-                f"Received {data.decode('utf-8').strip()} from " +
-                f"{Protocol.sockets[colour]['name']} in " +
-                f"~{int(move_time/10**4)/10**5}s."
+                f"{Protocol.sockets[colour]['name']} " +
+                ("accepted" if accepted else "refused") +
+                " the delta protocol."
             )
+        return rest
 
-        return (data.decode("utf-8"), move_time)
+    @staticmethod
+    def poll_delta(colour, verbose=False):
+        """Checks if the given colour agent uses the delta protocol. An
+        open offer is settled by an answer that already arrived, without
+        waiting for one, and anything sent after the answer is kept for
+        the next get_message. An agent that has not answered yet is
+        treated as refusing for now.
+        """
+
+        x = Protocol.sockets[colour]
+        if (x.get('delta', False) is None and x['pending'] is None):
+            readable, _, _ = select([x['conn']], [], [], 0)
+            if (readable):
+                text, move_time = Protocol._receive(colour, 10**9, verbose)
+                if (move_time != -1):
+                    rest = Protocol._answer_delta(colour, text, verbose)
+                    if (rest.strip() != ""):
+                        x['pending'] = (rest, move_time)
+
+        return Protocol.uses_delta(colour)
+
+    @staticmethod
+    def uses_delta(colour):
+        """Checks if the given colour agent accepted the delta protocol."""
+
+        return Protocol.sockets[colour].get('delta') is True
 
     @staticmethod
     def send_message(colour, message, verbose=False):
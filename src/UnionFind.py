@@ -0,0 +1,43 @@
+from typing import List
+
+
+class UnionFind:
+    """Disjoint-set forest used to track connected groups of stones.
+
+    Uses union by size and path halving, so both find and union run in
+    amortised O(alpha(n)) time.
+    """
+
+    def __init__(self, n: int) -> None:
+        self.parent: List[int] = list(range(n))
+        self.size: List[int] = [1] * n
+
+    def find(self, x: int) -> int:
+        """Returns the representative of the set containing x."""
+
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, x: int, y: int) -> int:
+        """Merges the sets containing x and y. Returns the new
+        representative.
+        """
+
+        x = self.find(x)
+        y = self.find(y)
+        if x == y:
+            return x
+
+        if self.size[x] < self.size[y]:
+            x, y = y, x
+        self.parent[y] = x
+        self.size[x] += self.size[y]
+        return x
+
+    def connected(self, x: int, y: int) -> bool:
+        """Checks if x and y are in the same set."""
+
+        return self.find(x) == self.find(y)
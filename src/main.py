@@ -3,10 +3,12 @@
 This is effectively what starts the game. This script may work when run
 directly, with the same specification as Hex.py, but it is not recommended.
 """
+import signal
 from sys import argv, platform
 from os.path import realpath, sep
 
 from Game import Game
+from Protocol import Protocol
 
 
 def main():
@@ -17,8 +19,12 @@ def main():
     silent_bots = ("-sb" in argv or "-silent_bots" in argv)
     java_ref_agent = ("-j" in argv or "-java" in argv)
     double = ("-d" in argv or "-double" in argv)
+    delta = ("-dp" in argv or "-delta" in argv)
+    binary_log = ("-bl" in argv or "-binary_log" in argv)
+    log = log or binary_log
 
     board_size = 11
+    port = Protocol.PORT
     agents = []
 
     for argument in argv:
@@ -35,6 +41,17 @@ def main():
                     "format. Aborted."
                 )
                 return
+        if (argument.startswith("port=")):
+            try:
+                port = int(argument.split("=")[1])
+                if (not 0 <= port < 2**16):
+                    raise Exception("Port out of range.")
+            except Exception as e:
+                print(
+                    "ERROR: Port argument is not in valid",
+                    "format. Aborted."
+                )
+                return
 
     if (len(agents) > 2):
         print("ERROR: Too many agents specified. Aborted.")
@@ -102,10 +119,20 @@ def main():
         log=log,
         print_protocol=print_protocol,
         kill_bots=kill_bots,
-        silent_bots=silent_bots
+        silent_bots=silent_bots,
+        delta=delta,
+        binary_log=binary_log,
+        port=port
     )
+    # a terminated match still closes its agents and writes out its
+    # buffered log
+    signal.signal(signal.SIGTERM, _terminate)
     g.run()
 
 
+def _terminate(signum, frame):
+    raise SystemExit(f"Terminated by signal {signum}.")
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,186 @@
+"""This script runs a round-robin tournament of Hex.
+
+Every pair of agents plays the given number of games, taking turns at
+playing Red. The matches run at the same time over a pool of worker
+processes, each match on its own free port, which the engine passes to
+the agents in the HEX_PORT environment variable. Agents that do not
+read it only work with the default port, so they can't take part.
+
+Possible arguments:
+* "agent=name;command" or "a=name;command" specifies one agent, as in
+main.py. At least two agents with unique names are needed.
+* "board_size=n" or "b=n" sets the board size, 11 by default.
+* "games=n" or "g=n" sets the number of games per pairing, 2 by
+default.
+* "workers=n" or "w=n" sets the number of matches played at once,
+the number of CPUs by default.
+* "-log" or "-l" saves every match to a csv file under logs.
+"""
+from contextlib import redirect_stderr, redirect_stdout
+from itertools import combinations
+from multiprocessing import Pool
+from os import cpu_count, devnull
+from sys import argv
+
+from Game import Game
+
+
+def play_match(match):
+    """Plays one match in a worker process. Returns the names of the
+    Red and Blue agents and the result of the game.
+    """
+
+    board_size, red, blue, log = match
+
+    # the engine's messages would interleave with the other matches'
+    with open(devnull, "w") as quiet:
+        with redirect_stdout(quiet), redirect_stderr(quiet):
+            g = Game(
+                board_size=board_size,
+                player1=red, player2=blue,
+                log=log,
+                kill_bots=True,
+                silent_bots=True,
+                port=0
+            )
+            g.run()
+
+    return (red['name'], blue['name'], g.get_result())
+
+
+def run_tournament(agents, board_size=11, games=2, workers=None, log=False):
+    """Plays games matches for every pair of agents, given as dictionaries
+    with a name and a run string, on up to workers processes at once.
+
+    Returns the standings, mapping each agent name to its games, wins,
+    losses, turns and total move time in nanoseconds, and the pairings,
+    mapping each pair of names to the wins of either agent. Games that
+    ended abnormally count as played but neither won nor lost.
+    """
+
+    matches = []
+    for first, second in combinations(agents, 2):
+        for idx in range(games):
+            if (idx % 2 == 0):
+                matches.append((board_size, first, second, log))
+            else:
+                matches.append((board_size, second, first, log))
+
+    standings = {}
+    for agent in agents:
+        standings[agent['name']] = {
+            'games': 0,
+            'wins': 0,
+            'losses': 0,
+            'turns': 0,
+            'time': 0
+        }
+    pairings = {}
+    for first, second in combinations(agents, 2):
+        pairings[(first['name'], second['name'])] = [0, 0]
+
+    with Pool(workers or cpu_count()) as pool:
+        results = pool.imap_unordered(play_match, matches)
+        for done, (red, blue, result) in enumerate(results, 1):
+            for name in (red, blue):
+                standings[name]['games'] += 1
+                if (result is not None and name in result['players']):
+                    player = result['players'][name]
+                    standings[name]['turns'] += player['turns']
+                    standings[name]['time'] += player['time']
+
+            winner = None
+            if (result is not None):
+                winner = result['winner']
+            if (winner is not None):
+                standings[winner]['wins'] += 1
+                standings[result['loser']]['losses'] += 1
+
+                pair = (red, blue) if (red, blue) in pairings else (blue, red)
+                pairings[pair][pair.index(winner)] += 1
+
+                print(
+                    f"[{done}/{len(matches)}] {red} (R) vs {blue} (B): " +
+                    f"{winner} won, {result['status']}."
+                )
+            else:
+                print(
+                    f"[{done}/{len(matches)}] {red} (R) vs {blue} (B): " +
+                    "ended abnormally."
+                )
+
+    return (standings, pairings)
+
+
+def print_results(standings, pairings):
+    """Prints the standings, best agent first, and the score of every
+    pairing.
+    """
+
+    print("\nAgent, games, wins, losses, win rate, mean move time")
+    ranking = sorted(
+        standings.items(),
+        key=lambda item: item[1]['wins'] / max(item[1]['games'], 1),
+        reverse=True
+    )
+    for name, stats in ranking:
+        win_rate = stats['wins'] / max(stats['games'], 1)
+        mean_time = stats['time'] / max(stats['turns'], 1) / 10**9
+        print(
+            f"{name}, {stats['games']}, {stats['wins']}, " +
+            f"{stats['losses']}, {win_rate:.3f}, {mean_time:.3f}s"
+        )
+
+    print("\nPairing, score")
+    for (first, second), (first_wins, second_wins) in pairings.items():
+        print(f"{first} vs {second}, {first_wins}-{second_wins}")
+
+
+def main():
+    log = ("-l" in argv or "-log" in argv)
+
+    board_size = 11
+    games = 2
+    workers = None
+    agents = []
+
+    for argument in argv[1:]:
+        try:
+            if (argument.startswith("agent=") or argument.startswith("a=")):
+                name, run_string = argument.split("=", 1)[1].split(";")
+                agents.append({'name': name, 'run string': run_string})
+            elif (argument.startswith("board_size=") or
+                    argument.startswith("b=")):
+                board_size = int(argument.split("=")[1])
+                if (board_size < 1):
+                    raise Exception("Board size too small.")
+            elif (argument.startswith("games=") or
+                    argument.startswith("g=")):
+                games = int(argument.split("=")[1])
+                if (games < 1):
+                    raise Exception("Too few games.")
+            elif (argument.startswith("workers=") or
+                    argument.startswith("w=")):
+                workers = int(argument.split("=")[1])
+                if (workers < 1):
+                    raise Exception("Too few workers.")
+        except Exception as e:
+            print(f"ERROR: Argument '{argument}' is not valid. Aborted.")
+            return
+
+    names = [agent['name'] for agent in agents]
+    if (len(agents) < 2):
+        print("ERROR: At least two agents are needed. Aborted.")
+        return
+    elif (len(names) != len(set(names))):
+        print("ERROR: Agent names must be unique. Aborted.")
+        return
+
+    standings, pairings = run_tournament(
+        agents, board_size, games, workers, log
+    )
+    print_results(standings, pairings)
+
+
+if __name__ == "__main__":
+    main()
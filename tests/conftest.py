@@ -0,0 +1,9 @@
+"""Puts the engine and the Group003 agent on the import path, as they are
+when their scripts run: the engine modules import each other by module
+name, and the agent imports its search code from the mcts package.
+"""
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT / "src"), str(ROOT / "agents" / "Group003")]
@@ -0,0 +1,103 @@
+from random import Random
+
+from mcts.ArrayBoard import ArrayBoard
+from mcts.Colour import Colour
+
+
+def random_game(board, rng):
+    """Plays random moves on board until it ends. Returns the moves."""
+
+    size = board.get_size()
+    cells = [(x, y) for x in range(size) for y in range(size)]
+    rng.shuffle(cells)
+    colour = Colour.RED
+    moves = []
+    for x, y in cells:
+        board.set_tile_colour(x, y, colour)
+        moves.append((x, y, colour))
+        if (board.has_ended()):
+            break
+        colour = colour.opposite()
+    return moves
+
+
+def test_undo_restores_cells_and_winner():
+    rng = Random(0)
+    for size in (2, 5, 11):
+        board = ArrayBoard(size)
+        states = []
+        cells = [(x, y) for x in range(size) for y in range(size)]
+        rng.shuffle(cells)
+        colour = Colour.RED
+        for x, y in cells:
+            states.append((bytes(board.get_cells()), board.get_winner()))
+            board.set_tile_colour(x, y, colour)
+            colour = colour.opposite()
+
+        for cells, winner in reversed(states):
+            board.undo()
+            assert bytes(board.get_cells()) == cells
+            assert board.get_winner() == winner
+
+
+def test_undo_all_stops_at_cleared_history():
+    board = ArrayBoard.from_string("R00,0B0,000", 3)
+    board.set_tile_colour(2, 2, Colour.RED)
+    board.clear_history()
+    board.set_tile_colour(1, 0, Colour.BLUE)
+    board.set_tile_colour(2, 0, Colour.RED)
+    board.undo_all()
+    assert board.print_board() == "R00,0B0,00R"
+
+
+def test_undone_board_plays_like_a_fresh_one():
+    rng = Random(1)
+    board = ArrayBoard(7)
+    for _ in range(30):
+        moves = random_game(board, rng)
+        fresh = ArrayBoard(7)
+        for x, y, colour in moves:
+            fresh.set_tile_colour(x, y, colour)
+        assert board.get_winner() == fresh.get_winner()
+        board.undo_all()
+        assert board.get_empty_cells() == list(range(49))
+
+
+def test_hash_depends_on_the_position_only():
+    rng = Random(2)
+    board = ArrayBoard(5)
+    moves = random_game(board, rng)
+    hashes = {board.get_hash()}
+
+    # the same stones in another order, and loaded from the string
+    other = ArrayBoard(5)
+    for x, y, colour in reversed(moves):
+        other.set_tile_colour(x, y, colour)
+    hashes.add(other.get_hash())
+    hashes.add(ArrayBoard.from_string(board.print_board(), 5).get_hash())
+    hashes.add(board.copy().get_hash())
+    assert len(hashes) == 1
+
+
+def test_undo_restores_the_hash():
+    rng = Random(3)
+    board = ArrayBoard(6)
+    empty = board.get_hash()
+    seen = {}
+    for _ in range(20):
+        moves = random_game(board, rng)
+        for _ in moves:
+            board.undo()
+        assert board.get_hash() == empty
+
+        for x, y, colour in moves:
+            board.set_tile_colour(x, y, colour)
+            key = bytes(board.get_cells())
+            assert seen.setdefault(key, board.get_hash()) == board.get_hash()
+        board.undo_all()
+
+
+def test_hash_tells_colours_apart():
+    red = ArrayBoard.from_string("R0,00", 2)
+    blue = ArrayBoard.from_string("B0,00", 2)
+    assert len({red.get_hash(), blue.get_hash(), ArrayBoard(2).get_hash()}) == 3
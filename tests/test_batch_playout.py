@@ -0,0 +1,35 @@
+import numpy as np
+
+from mcts.ArrayBoard import ArrayBoard, RED, BLUE
+from mcts.Colour import Colour
+from mcts.batch_playout import batch_playout, red_connects_batch
+from mcts.playout import red_connects
+
+
+def test_batch_matches_single_board_check():
+    rng = np.random.default_rng(0)
+    for size in (1, 2, 3, 7, 11):
+        for density in (0.3, 0.5, 0.7):
+            red = rng.random((64, size, size)) < density
+            expected = [
+                red_connects(bytearray(board.astype(np.uint8).ravel()), size)
+                for board in red
+            ]
+            assert red_connects_batch(red).tolist() == expected
+
+
+def test_batch_playout_fills_the_board_by_turns():
+    board = ArrayBoard.from_string("R00,0B0,000", 3)
+    cells = batch_playout(board, Colour.RED, 50, np.random.default_rng(1))
+    assert cells.shape == (50, 3, 3)
+    flat = cells.reshape(50, 9)
+    # stones already on the board stay, and the player to move gets the
+    # larger half of the 7 empty cells
+    assert (flat[:, 0] == RED).all() and (flat[:, 4] == BLUE).all()
+    assert ((flat == RED).sum(axis=1) == 5).all()
+    assert ((flat == BLUE).sum(axis=1) == 4).all()
+
+    # the batch check agrees with the single board one on the playouts
+    winners = red_connects_batch(cells == RED)
+    for filled, red_won in zip(flat, winners):
+        assert red_connects(bytearray(filled.astype(np.uint8)), 3) == red_won
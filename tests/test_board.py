@@ -0,0 +1,45 @@
+from random import Random
+
+from Board import Board
+from Colour import Colour
+from mcts.ArrayBoard import RED
+from mcts.playout import red_connects
+
+
+def connects(board, colour):
+    """Checks with a flood fill if colour joins its edges on board. Blue's
+    left-right chain is red's top-bottom chain on the transposed board,
+    as the hex neighbourhood is symmetric under transposition.
+    """
+
+    size = board.get_size()
+    tiles = board.get_tiles()
+    cells = bytearray(size * size)
+    for x in range(size):
+        for y in range(size):
+            if (colour == Colour.RED and tiles[x][y].get_colour() == colour):
+                cells[x * size + y] = RED
+            if (colour == Colour.BLUE and tiles[y][x].get_colour() == colour):
+                cells[x * size + y] = RED
+    return red_connects(cells, size)
+
+
+def test_incremental_winner_matches_a_flood_fill():
+    rng = Random(0)
+    for size in (1, 2, 5, 11):
+        for _ in range(20):
+            board = Board(size)
+            cells = [(x, y) for x in range(size) for y in range(size)]
+            rng.shuffle(cells)
+            colour = Colour.RED
+            for x, y in cells:
+                board.set_tile_colour(x, y, colour)
+                winner = None
+                for player in Colour:
+                    if (connects(board, player)):
+                        winner = player
+                assert board.get_winner() == winner
+                assert board.has_ended() == (winner is not None)
+                if (winner is not None):
+                    break
+                colour = colour.opposite()
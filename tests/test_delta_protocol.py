@@ -0,0 +1,87 @@
+import socket
+from random import Random
+from zlib import crc32
+
+import pytest
+
+from Board import Board
+from Colour import Colour
+from Protocol import Protocol
+from mcts.protocol_board import ProtocolBoard
+
+
+def test_kept_board_checksum_matches_the_engine():
+    rng = Random(0)
+    board = Board(7)
+    kept = ProtocolBoard(7)
+    cells = [(x, y) for x in range(7) for y in range(7)]
+    rng.shuffle(cells)
+    colour = Colour.RED
+    for x, y in cells[:30]:
+        board.set_tile_colour(x, y, colour)
+        kept.play(x, y, colour.get_char())
+        engine = board.print_board()
+        assert kept.string() == engine
+        # the checksum field the engine sends, as Game._make_move builds it
+        field = f"#{crc32(engine.encode()):08x}"
+        assert kept.matches(field)
+        assert kept.matches("#")
+        colour = colour.opposite()
+
+    assert not kept.matches("#00000000")
+    kept.set(board.print_board())
+    assert kept.matches(f"#{crc32(board.print_board().encode()):08x}")
+
+
+@pytest.fixture
+def agent():
+    """Connects a socket pair as the Red agent, with the delta protocol
+    offered. Yields the agent's end.
+    """
+
+    engine_end, agent_end = socket.socketpair()
+    saved = Protocol.sockets
+    Protocol.sockets = {
+        Colour.RED: {
+            'name': "Red", 'conn': engine_end, 'delta': False,
+            'pending': None
+        },
+        Colour.BLUE: {}
+    }
+    Protocol.offer_delta(Colour.RED)
+    yield agent_end
+    Protocol.sockets = saved
+    engine_end.close()
+    agent_end.close()
+
+
+def test_answer_is_taken_off_the_first_move(agent):
+    agent.sendall(b"DELTA\n3,4\n")
+    text, move_time = Protocol.get_message(Colour.RED, 10**9)
+    assert text.strip() == "3,4"
+    assert move_time >= 0
+    assert Protocol.uses_delta(Colour.RED)
+
+
+def test_move_without_answer_refuses(agent):
+    agent.sendall(b"3,4\n")
+    text, _ = Protocol.get_message(Colour.RED, 10**9)
+    assert text.strip() == "3,4"
+    assert not Protocol.uses_delta(Colour.RED)
+
+
+def test_poll_does_not_wait_for_an_answer(agent):
+    # silence is no delta for now, and the offer stays open
+    assert not Protocol.poll_delta(Colour.RED)
+    agent.sendall(b"DELTA\n")
+    # a late answer sent on its own is read with the move after it
+    agent.sendall(b"1,1\n")
+    text, _ = Protocol.get_message(Colour.RED, 10**9)
+    assert text.strip() == "1,1"
+    assert Protocol.uses_delta(Colour.RED)
+
+
+def test_poll_reads_an_answer_already_sent(agent):
+    agent.sendall(b"DELTA\n")
+    assert Protocol.poll_delta(Colour.RED)
+    assert Protocol.sockets[Colour.RED]['pending'] is None
@@ -0,0 +1,81 @@
+from Colour import Colour
+from EndState import EndState
+from Game import Game
+from LogWriter import LogWriter
+
+
+def test_binary_log_round_trip(tmp_path):
+    writer = LogWriter(str(tmp_path), 11, binary=True)
+    writer.write("header\n")
+    writer.write_move(1, Colour.RED, 3, 4, 1500)
+    writer.write_move(2, Colour.BLUE, -1, -1, 20)
+    writer.write_move(3, Colour.RED, 11, 2**15, 7)
+    writer.write_end(Colour.RED, EndState.BAD_MOVE, True, 10**12)
+    writer.close()
+    writer.close()
+
+    assert LogWriter.read_records(writer.binary_path) == (11, [
+        (1, 1, 3, 4, 1500),
+        (2, 2, -1, -1, 20),
+        # coordinates too large for a record are stored as illegal
+        (3, 1, -2, -2, 7),
+        (0, 1, 3, 1, 10**12),
+    ])
+    with open(writer.path) as f:
+        assert f.read() == "header\n"
+
+
+def test_values_beyond_the_fields_are_clamped(tmp_path):
+    writer = LogWriter(str(tmp_path), 5, binary=True)
+    writer.write_move(70000, Colour.RED, 0, 0, 1)
+    writer.write_move(2**40, Colour.BLUE, 0, 0, 2**70)
+    writer.close()
+
+    _, records = LogWriter.read_records(writer.binary_path)
+    assert records == [
+        (70000, 1, 0, 0, 1),
+        (2**32 - 1, 2, 0, 0, 2**63 - 1),
+    ]
+
+
+class FullDisk:
+    """Stands in for a log file on a full disk."""
+
+    def write(self, data):
+        raise OSError("No space left on device")
+
+    def flush(self):
+        raise OSError("No space left on device")
+
+    def close(self):
+        self.flush()
+
+
+def test_write_errors_do_not_raise(tmp_path, capsys):
+    writer = LogWriter(str(tmp_path), 5, binary=True)
+    writer._csv.close()
+    writer._csv = FullDisk()
+    writer.write("lost\n")
+    writer.write_move(1, Colour.RED, 0, 0, 1)
+    writer.flush()
+    writer.close()
+    assert writer.failed
+    assert capsys.readouterr().err.count("could not be written") == 1
+
+
+def test_game_is_ended_once(tmp_path):
+    game = Game(board_size=3, log=False)
+    game._log = True
+    game._log_writer = LogWriter(str(tmp_path), 3, binary=True)
+    game._log_path = game._log_writer.path
+
+    game._end_game(None)
+    # a second call, as from a signal during the first, changes nothing
+    game._end_game(EndState.WIN)
+    game._close_log()
+
+    with open(game._log_path) as f:
+        assert f.read().count(",End,") == 1
+    _, records = LogWriter.read_records(game._log_writer.binary_path)
+    assert len(records) == 1
+    assert game.get_result()['status'] == EndState.get_text(None)
@@ -0,0 +1,38 @@
+"""Runs the brute-force soundness checks of check_soundness.py on every
+3x3 position, which takes a few seconds. Bigger boards are left to the
+script.
+"""
+import pytest
+
+from check_soundness import (
+    boards, check_captured_win, check_inferior, check_vc
+)
+from mcts.vc import VCEngine
+
+
+@pytest.fixture(scope="module")
+def memo():
+    """Solved positions, shared by the tests of this module."""
+
+    return {}
+
+
+def test_inferior_cells_are_sound(memo):
+    failures = []
+    for board, to_move in boards(3, 0, 0):
+        for failure in check_inferior(board, to_move, memo):
+            failures.append(f"{board.print_board()}: {failure}")
+    assert failures == []
+
+
+def test_pruned_search_plays_a_captured_win():
+    assert check_captured_win() == []
+
+
+def test_virtual_connection_verdicts_are_right(memo):
+    engine = VCEngine()
+    failures = []
+    for board, to_move in boards(3, 0, 0):
+        for failure in check_vc(board, to_move, memo, engine):
+            failures.append(f"{board.print_board()}: {failure}")
+    assert failures == []
@@ -0,0 +1,44 @@
+from pytest import approx
+
+from mcts.Colour import Colour
+from mcts.time_manager import TimeManager
+from mcts.uct_algorithm import UCT
+
+
+def test_budget_shares_the_clock_over_the_moves_left():
+    clock = TimeManager()
+    # 121 empty cells are taken as 30 moves left
+    assert clock.budget(121) == approx((300 - 10) / 30)
+    # never fewer than min_moves_left moves, and never above max_budget
+    assert clock.budget(8) == 20.0
+    clock = TimeManager(max_budget=100)
+    assert clock.budget(8) == approx((300 - 10) / 5)
+
+
+def test_record_books_time_and_overhead():
+    clock = TimeManager()
+    budget = clock.budget(121)
+    clock.record(budget + 0.5)
+    assert clock.remaining() == approx(300 - budget - 0.5)
+    assert clock.overhead == approx(0.5)
+    # the overhead is taken off the next budget
+    assert clock.budget(121) == approx((clock.remaining() - 10) / 30 - 0.5)
+
+
+def test_emergency_budget_never_goes_negative():
+    clock = TimeManager()
+    clock.record(295)
+    assert clock.budget(121) == approx(0.05)
+    clock.record(4.99)
+    assert 0 < clock.budget(121) < 0.05
+    clock.record(10)
+    assert clock.budget(121) == 0
+
+
+def test_search_without_time_still_moves():
+    uct = UCT(board_size=5, colour=Colour.RED)
+    uct.TIME = 0
+    move = uct.search("R0000,00000,00B00,00000,00000")
+    x, y = (int(c) for c in move.decode().strip().split(","))
+    assert 0 <= x < 5 and 0 <= y < 5
+    assert (x, y) not in ((0, 0), (2, 2))
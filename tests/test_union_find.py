@@ -0,0 +1,75 @@
+from random import Random
+
+from mcts.UnionFind import UnionFind as RollbackUnionFind
+from UnionFind import UnionFind
+
+
+def groups(uf, n):
+    """Returns the partition of range(n) held by uf, as a set of sets."""
+
+    sets = {}
+    for x in range(n):
+        sets.setdefault(uf.find(x), set()).add(x)
+    return {frozenset(s) for s in sets.values()}
+
+
+def test_rollback_restores_every_earlier_state():
+    rng = Random(0)
+    uf = RollbackUnionFind(30)
+    snapshots = []
+    for _ in range(40):
+        snapshots.append((len(uf.history), groups(uf, 30), list(uf.size)))
+        uf.union(rng.randrange(30), rng.randrange(30))
+
+    for mark, partition, size in reversed(snapshots):
+        uf.rollback(mark)
+        assert groups(uf, 30) == partition
+        assert uf.size == size
+
+
+def test_rollback_skips_unions_within_a_set():
+    uf = RollbackUnionFind(4)
+    uf.union(0, 1)
+    mark = len(uf.history)
+    uf.union(1, 0)
+    assert len(uf.history) == mark
+
+
+def test_clear_history_makes_unions_permanent():
+    uf = RollbackUnionFind(4)
+    uf.union(0, 1)
+    uf.clear_history()
+    uf.rollback(0)
+    assert uf.connected(0, 1)
+
+
+def test_find_halves_the_path():
+    uf = UnionFind(5)
+    # a chain 4 -> 3 -> 2 -> 1 -> 0, as union by size never builds it
+    uf.parent = [0, 0, 1, 2, 3]
+    assert uf.find(4) == 0
+    # every node on the path now points at its grandparent
+    assert uf.parent == [0, 0, 0, 2, 2]
+    assert uf.find(4) == 0
+    assert uf.parent[4] == 0
+
+
+def test_union_by_size_keeps_the_larger_root():
+    uf = UnionFind(5)
+    uf.union(0, 1)
+    uf.union(0, 2)
+    root = uf.find(0)
+    assert uf.union(3, 0) == root
+    assert uf.size[root] == 4
+    assert uf.connected(3, 2)
+    assert not uf.connected(4, 1)
+
+
+def test_partition_matches_the_rollback_version():
+    rng = Random(1)
+    fast, reference = UnionFind(50), RollbackUnionFind(50)
+    for _ in range(60):
+        x, y = rng.randrange(50), rng.randrange(50)
+        fast.union(x, y)
+        reference.union(x, y)
+        assert groups(fast, 50) == groups(reference, 50)